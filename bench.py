@@ -0,0 +1,151 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+import snaky
+
+FILLS = (0.10, 0.50, 0.80, 0.95)
+DEFAULT_SNAPSHOTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_snapshots.json")
+PERCENTILES = (50, 90, 99)
+
+def make_snapshot(h, w, seed, fill):
+    target = round(fill * h * w)
+    for planner in ("heuristic", "hamiltonian"):
+        game = snaky.SnakeGame(h + 2, w + 2, seed=seed, planner=snaky.PLANNERS[planner]())
+        while game.alive and len(game.body) < target:
+            game.step()
+        if len(game.body) >= target: break
+    else:
+        raise RuntimeError(f"no planner reached {fill:.0%} on {h}x{w} with seed {seed}")
+    return {
+        "name": f"{h}x{w}-{round(fill * 100)}%", "size": [h, w], "seed": seed, "planner": planner,
+        "fill": round(len(game.body) / (h * w), 4), "steps": game.steps,
+        "steps_since_food": game.steps_since_food, "food": list(game.food), "body": [list(p) for p in game.body],
+    }
+
+def load_game(snapshot, planner):
+    h, w = snapshot["size"]
+    game = snaky.SnakeGame(h + 2, w + 2, seed=snapshot["seed"], planner=snaky.PLANNERS[planner](), cache_size=0)
+    game.load_state([tuple(p) for p in snapshot["body"]], tuple(snapshot["food"]),
+                    snapshot["steps"], snapshot["steps_since_food"])
+    return game
+
+def targets(game):
+    head, food = game.body[0], game.food
+    tail_cell = game.cell_of(game.body[-1])
+
+    def with_free_tail(fn):
+        def run():
+            game.release(tail_cell)
+            try: return fn()
+            finally: game.occupy(tail_cell)
+        return run
+
+    def get_ai_move():
+        game.planner.reset(game)
+        return game.get_ai_move()
+
+    game.release(tail_cell)
+    path = game.a_star(head, food) or game.get_neighbors(head)[:1]
+    game.occupy(tail_cell)
+
+    return {
+        "a_star": with_free_tail(lambda: game.a_star(head, food)),
+        "a_star_hunt": with_free_tail(lambda: game.a_star(head, food, use_complex_heuristic=True)),
+        "flood_fill": with_free_tail(lambda: game.flood_fill(head)),
+        "distance_field": with_free_tail(lambda: game.distance_field(food)),
+        "is_path_fully_safe": with_free_tail(lambda: game.is_path_fully_safe(path)),
+        "get_ai_move": get_ai_move,
+    }
+
+def measure(fn, warmup, reps):
+    clock = time.perf_counter_ns
+    for _ in range(warmup): fn()
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(reps):
+            t0 = clock()
+            fn()
+            samples.append(clock() - t0)
+    finally:
+        gc.enable()
+    samples.sort()
+    result = {f"p{p}": samples[min(len(samples) - 1, len(samples) * p // 100)] / 1000 for p in PERCENTILES}
+    result["min"] = samples[0] / 1000
+    result["mean"] = sum(samples) / len(samples) / 1000
+    return result
+
+def run_benchmarks(args):
+    with open(args.snapshots) as f:
+        snapshots = json.load(f)["snapshots"]
+    results = {}
+    for snapshot in snapshots:
+        game = load_game(snapshot, args.planner)
+        for name, fn in targets(game).items():
+            if args.only and name not in args.only: continue
+            key = f"{snapshot['name']} {name}"
+            results[key] = measure(fn, args.warmup, args.reps)
+            r = results[key]
+            print(f"{key:<34} min {r['min']:>9.1f}  p50 {r['p50']:>9.1f}  p90 {r['p90']:>9.1f}  "
+                  f"p99 {r['p99']:>9.1f}  mean {r['mean']:>9.1f} us", flush=True)
+    return results
+
+def compare(results, baseline, threshold):
+    regressions = 0
+    print(f"\n{'benchmark':<34} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for key, r in results.items():
+        if key not in baseline: continue
+        base = baseline[key]["p50"]
+        change = (r["p50"] - base) / max(base, 1e-9)
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key:<34} {base:>10.1f} {r['p50']:>10.1f} {change:>+8.1%}{flag}")
+    print(f"\n{regressions} regression(s) over {threshold:.0%}")
+    return regressions
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Time the planner's searches on frozen board snapshots.")
+    parser.add_argument('--snapshots', default=DEFAULT_SNAPSHOTS, help="snapshot file (default: bench_snapshots.json)")
+    parser.add_argument('--make-snapshots', action='store_true', help="play seeded games and write new snapshots")
+    parser.add_argument('--size', type=snaky.parse_size, default=(20, 40), help="board size for --make-snapshots")
+    parser.add_argument('--seed', type=int, default=1, help="game seed for --make-snapshots")
+    parser.add_argument('-p', '--planner', choices=sorted(snaky.PLANNERS), default='heuristic')
+    parser.add_argument('--only', nargs='+', help="benchmarks to run, e.g. a_star get_ai_move")
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--reps', type=int, default=200)
+    parser.add_argument('--save', help="write results as a baseline JSON file")
+    parser.add_argument('--compare', help="baseline JSON file to compare p50 timings against")
+    parser.add_argument('--threshold', type=float, default=10.0, help="regression threshold in percent (default: 10)")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    if args.make_snapshots:
+        h, w = args.size
+        snapshots = [make_snapshot(h, w, args.seed, fill) for fill in FILLS]
+        with open(args.snapshots, 'w') as f:
+            json.dump({"snapshots": snapshots}, f, separators=(',', ':'))
+        for s in snapshots:
+            print(f"{s['name']}  fill {s['fill']:.1%}  planner {s['planner']}  steps {s['steps']}")
+        return 0
+
+    results = run_benchmarks(args)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({"planner": args.planner, "results": results}, f, indent=2)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        return 1 if compare(results, baseline, args.threshold / 100) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,82 @@
 import curses
 import random
 import time
-import heapq
+from heapq import heappop, heappush
 import sys
 import traceback
 import argparse
 import os
-from collections import deque
+import csv
+import json
+import struct
+import multiprocessing
+from multiprocessing import shared_memory
+import queue
+import threading
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, fields
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 FOOD_CHAR = '● '
 HEAD_CHARS = {'U': '▲ ', 'D': '▼ ', 'L': '◀ ', 'R': '▶ '}
 TAIL_CHAR = '▪ '
 VISION_CHAR = '· '
+WALL_CHAR = '░░'
+MINIMAP_SHADES = " ░▒▓█"
 
 SPEEDS = {
     "Normal": 0.05, "Fast": 0.03, "Insane": 0.01, "WTF": 0.001
 }
 SPEED_LIST = ["Normal", "Fast", "Insane", "WTF"]
 
+FREE, BODY, WALL = 0, 1, 2
+FREE_MASK = bytes([1]) + bytes(255)
+NUMPY_MIN_AREA = 4096
+PLAN_BUDGET_SHARE = 0.5
+PLAN_QUEUE_DEPTH = 32
+SEARCH_CACHE_SIZE = 4096
+TUNE_TRIALS = 32
+TUNE_GAMES = 16
+ZOBRIST_SEED = 0x5EED
+ZOBRIST_KEYS = {}
+MAX_FPS = 60
+VIEW_MARGIN = 5
+MINIMAP_INTERVAL = 0.25
+DEFAULT_SIZE = (20, 40)
+CATCH_UP_FRAMES = 4
+REPLAY_MAGIC = b"SNKR"
+REPLAY_VERSION = 1
+KEYFRAME_INTERVAL = 1024
+ESCAPE_HORIZON = 512
+SNAPSHOT_MAGIC = b"SNKS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_INTERVAL = 30
+DEFAULT_SNAPSHOT = os.path.join(os.path.expanduser("~"), ".snaky_save")
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIRECTION_CODES = {d: i for i, d in enumerate(DIRECTIONS)}
+END_CAUSES = (None, "starved", "trapped", "cleared", "looped")
+LOOPED = object()
+PROFILE_SEARCHES = ("a_star", "flood_fill", "distance_field", "is_path_fully_safe", "is_move_safe", "spawn_food")
+PROFILE_DRAWS = ("render", "draw_segment", "draw_food", "draw_ui", "draw_minimap", "present")
+PROFILE_LABELS = {"a_star": "A*", "flood_fill": "fill", "distance_field": "field", "is_path_fully_safe": "safe",
+                  "is_move_safe": "move", "spawn_food": "food", "render": "render", "draw_segment": "seg",
+                  "draw_food": "food", "draw_ui": "ui", "draw_minimap": "map", "present": "flush"}
+
 WIDE_RENDER = {'│': '│ ', '─': '──', '┌': '┌─', '┐': '┐ ', '└': '└─', '┘': '┘ '}
 PIPE_MAP = {
     frozenset(['U', 'D']): '│', frozenset(['L', 'R']): '─',
     frozenset(['D', 'R']): '┌', frozenset(['D', 'L']): '┐',
     frozenset(['U', 'R']): '└', frozenset(['U', 'L']): '┘',
 }
+GLYPHS = ("  ", FOOD_CHAR, WALL_CHAR, TAIL_CHAR, "O ", *HEAD_CHARS.values(), *WIDE_RENDER.values())
+GLYPH_CODES = {g: i for i, g in enumerate(GLYPHS)}
+TILE_HEADER = struct.Struct("<QIIIq")
+TILES_CONTROLS = " [▲/▼] Speed  [R] Reset  [SPACE] Pause  [Q] Quit "
 
 BANNER = [
     "███████╗███╗   ██╗ █████╗ ██╗  ██╗██╗   ██╗",
@@ -37,85 +90,256 @@ BANNER = [
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
-class PriorityQueue:
-    def __init__(self):
-        self.elements = []
-    def empty(self):
-        return len(self.elements) == 0
-    def put(self, item, priority):
-        heapq.heappush(self.elements, (priority, item))
-    def get(self):
-        return heapq.heappop(self.elements)[1]
-
-class SnakeAI:
-    def __init__(self, stdscr, args):
-        self.stdscr = stdscr
-
-        self.resolve_speed(args.speed)
-        self.show_vision = args.vision
-        self.hide_ui = args.hide_ui
-
-        y, x = stdscr.getmaxyx()
-        self.max_y = y
-        self.max_x = x // 2
-
-        if self.max_y < 10 or self.max_x < 10:
-            raise Exception(f"Terminal too small! ({self.max_y}x{self.max_x})")
-
-        self.play_top = 1
-        self.play_bottom = self.max_y - 2
-        self.grid_area = self.max_y * self.max_x
+def speed_index(arg_speed):
+    lookup = {
+        'n': 'Normal', 'normal': 'Normal',
+        'f': 'Fast', 'fast': 'Fast',
+        'i': 'Insane', 'insane': 'Insane',
+        'w': 'WTF', 'wtf': 'WTF'
+    }
+    return SPEED_LIST.index(lookup.get(str(arg_speed).lower(), 'Normal'))
+
+def render_char(curr, prev, nxt):
+    y, x = curr
+    if prev is None:
+        if not nxt: return "O "
+        ny, nx = nxt
+        if ny < y: return HEAD_CHARS['D']
+        if ny > y: return HEAD_CHARS['U']
+        if nx < x: return HEAD_CHARS['R']
+        if nx > x: return HEAD_CHARS['L']
+    if nxt is None: return TAIL_CHAR
+    neighbors = []
+    for node in [prev, nxt]:
+        ny, nx = node
+        if ny < y: neighbors.append('U')
+        elif ny > y: neighbors.append('D')
+        elif nx < x: neighbors.append('L')
+        elif nx > x: neighbors.append('R')
+    base = PIPE_MAP.get(frozenset(neighbors), ' ')
+    return WIDE_RENDER.get(base, '  ')
+
+def scroll_offset(pos, offset, span, size):
+    if size <= span: return -((span - size) // 2)
+    margin = max(1, min(VIEW_MARGIN, span // 4))
+    if not margin <= pos - offset < span - margin: offset = pos - span // 2
+    return max(0, min(offset, size - span))
+
+@dataclass(frozen=True)
+class Params:
+    hunt_degree_weight: int = 0
+    food_pad: int = 2
+    food_pad_fill: float = 0.50
+    search_floor: int = 4000
+    search_factor: int = 8
+    starve_factor: int = 2
+
+DEFAULT_PARAMS = Params()
+PARAM_SPACE = {
+    "hunt_degree_weight": (0, 1, 2, 3),
+    "food_pad": (0, 1, 2, 3),
+    "food_pad_fill": (0.25, 0.50, 0.75),
+    "search_floor": (1000, 4000, 16000),
+    "search_factor": (2, 4, 8, 16),
+    "starve_factor": (1, 2, 4),
+}
 
-        playable_height = (self.play_bottom - self.play_top) + 1
-        playable_width = (self.max_x - 2)
-        self.playable_area = playable_height * playable_width
+def load_params(path):
+    with open(path) as f:
+        values = json.load(f)
+    names = {field.name for field in fields(Params)}
+    unknown = set(values) - names
+    if unknown: raise ValueError(f"unknown parameters in {path}: {', '.join(sorted(unknown))}")
+    return Params(**values)
+
+MISSING = object()
+
+class SearchCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+def zobrist_keys(area):
+    if area not in ZOBRIST_KEYS:
+        rng = random.Random(ZOBRIST_SEED + area)
+        keys = array('Q', rng.randbytes(area * 48))
+        ZOBRIST_KEYS[area] = (keys[:area], keys[area:])
+    return ZOBRIST_KEYS[area]
+
+class SpaceLabels:
+    def __init__(self, game, incremental=True):
+        self.game = game
+        self.incremental = incremental
+        w = game.max_x
+        self.ring = (-w, -w + 1, 1, w + 1, w, w - 1, -1, -w - 1)
+        self.rebuilds = 0
+        self.dirty = True
+        self.built_at = None
+
+    def copy(self, game):
+        other = SpaceLabels(game, incremental=self.incremental)
+        if not self.dirty:
+            other.node_of = array('i', self.node_of)
+            other.parent = list(self.parent)
+            other.size = list(self.size)
+            other.dirty = False
+            other.built_at = self.built_at
+        return other
+
+    def rebuild(self):
+        game = self.game
+        self.node_of = array('i', [-1]) * game.grid_area
+        self.parent = []
+        self.size = []
+        tail_cell = game.cell_of(game.body[-1])
+        for start in game.free_cells:
+            if self.node_of[start] < 0:
+                self.fill(start, tail_cell)
+        if self.node_of[tail_cell] < 0:
+            self.fill(tail_cell, tail_cell)
+        self.dirty = False
+        self.built_at = game.steps
+        self.rebuilds += 1
+
+    def fill(self, start, tail_cell):
+        grid = self.game.grid
+        offsets = self.game.offsets
+        node_of = self.node_of
+        label = len(self.parent)
+        node_of[start] = label
+        queue = [start]
+        for c in queue:
+            for o in offsets:
+                n = c + o
+                if node_of[n] < 0 and (grid[n] == FREE or n == tail_cell):
+                    node_of[n] = label
+                    queue.append(n)
+        self.parent.append(label)
+        self.size.append(len(queue))
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def ensure(self):
+        if self.dirty or (not self.incremental and self.built_at != self.game.steps):
+            self.rebuild()
+
+    def label(self, pos):
+        self.ensure()
+        node = self.node_of[self.game.cell_of(pos)]
+        return -1 if node < 0 else self.find(node)
+
+    def space(self, pos):
+        root = self.label(pos)
+        return 0 if root < 0 else self.size[root]
+
+    def occupy(self, cell):
+        if not self.incremental or self.dirty: return
+        node_of = self.node_of
+        node = node_of[cell]
+        if node < 0: return
+        node_of[cell] = -1
+        self.size[self.find(node)] -= 1
+
+        ring_open = [node_of[cell + o] >= 0 for o in self.ring]
+        if all(ring_open): return
+        start = ring_open.index(False)
+        runs = 0
+        touches = False
+        for k in range(1, 9):
+            i = (start + k) % 8
+            if ring_open[i]:
+                touches = touches or i % 2 == 0
+            else:
+                runs += touches
+                touches = False
+        if runs > 1:
+            self.dirty = True
+
+    def release(self, cell):
+        if not self.incremental or self.dirty: return
+        node_of = self.node_of
+        if node_of[cell] >= 0: return
+        if len(self.parent) > 4 * self.game.grid_area:
+            self.dirty = True
+            return
+        root = len(self.parent)
+        self.parent.append(root)
+        self.size.append(1)
+        node_of[cell] = root
+        for o in self.game.offsets:
+            node = node_of[cell + o]
+            if node < 0: continue
+            other = self.find(node)
+            if other == root: continue
+            if self.size[other] > self.size[root]:
+                root, other = other, root
+            self.parent[other] = root
+            self.size[root] += self.size[other]
+
+class SnakeGame:
+    def __init__(self, max_y, max_x, seed=None, incremental_labels=True, planner=None, plan_budget=None,
+                 cache_size=SEARCH_CACHE_SIZE, params=None):
+        self.max_y = max_y
+        self.max_x = max_x
         self.start_length = 10
-
-        self.dynamic_limit = max(4000, self.grid_area * 8)
+        self.incremental_labels = incremental_labels
+        self.planner = planner or HeuristicPlanner()
+        self.plan_budget = plan_budget
+        self.deadline = None
+        self.budget_cut = False
+        self.search_partial = False
+        self.search_stats = None
+        self.cache_size = cache_size
+        self.params = params or DEFAULT_PARAMS
+
+        if self.max_y < 10 or self.max_x // 2 < self.start_length:
+            raise Exception(f"Board too small! ({self.max_y}x{self.max_x})")
+
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.recorder = None
 
         self.score = 0
         self.high_score = 0
-        self.paused = False
         self.vision_path = []
-        self.prev_vision_path = []
 
+        self.steps = 0
         self.steps_since_food = 0
 
-        self.head_history = deque(maxlen=200)
+        self.state_steps = {}
+        self.cycles = 0
+        self.escape_until = -1
+        self.food_loops = 0
+        self.loop_start = -1
+        self.last_escape = -1
 
         self.game_over = False
         self.killer_pos = None
-        self.reset(first_launch=True)
-
-    def resolve_speed(self, arg_speed):
-        lookup = {
-            'n': 'Normal', 'normal': 'Normal',
-            'f': 'Fast', 'fast': 'Fast',
-            'i': 'Insane', 'insane': 'Insane',
-            'w': 'WTF', 'wtf': 'WTF'
-        }
-        target = lookup.get(str(arg_speed).lower(), 'Normal')
-        try:
-            self.speed_idx = SPEED_LIST.index(target)
-        except ValueError:
-            self.speed_idx = 0
-        self.update_speed()
-
-    def update_speed(self):
-        self.speed_name = SPEED_LIST[self.speed_idx]
-        self.speed_delay = SPEEDS[self.speed_name]
-
-    def change_speed(self, delta):
-        new_idx = self.speed_idx + delta
-        if 0 <= new_idx < len(SPEED_LIST):
-            self.speed_idx = new_idx
-            self.update_speed()
-
-    def reset(self, first_launch=False):
-        y, x = self.stdscr.getmaxyx()
-        self.max_y = y
-        self.max_x = x // 2
+        self.death_cause = None
+        self.last_tail = None
+        self.reset_board()
 
+    def reset_board(self):
         self.play_top = 1
         self.play_bottom = self.max_y - 2
 
@@ -124,283 +348,1488 @@ class SnakeAI:
         self.playable_area = playable_height * playable_width
 
         self.grid_area = self.max_y * self.max_x
-        self.dynamic_limit = max(4000, self.grid_area * 8)
+        self.dynamic_limit = max(self.params.search_floor, self.grid_area * self.params.search_factor)
 
+        self.steps = 0
         cy, cx = self.max_y // 2, self.max_x // 2
-        self.body = [(cy, cx - i) for i in range(self.start_length)]
+        self.body = deque((cy, cx - i) for i in range(self.start_length))
+        self.build_grid()
+        self.score = 0
         self.food = self.spawn_food()
         self.alive = True
         self.status_msg = "Ready"
-        self.score = 0
-        self.head_history.clear()
+        self.state_steps.clear()
+        self.cycles = 0
+        self.escape_until = -1
+        self.food_loops = 0
+        self.loop_start = -1
+        self.last_escape = -1
         self.game_over = False
         self.killer_pos = None
+        self.death_cause = None
+        self.last_tail = None
         self.vision_path = []
-
         self.steps_since_food = 0
 
-        self.stdscr.clear()
-        if not first_launch:
-            pass
+        self.plan_hits = 0
+        self.plan_misses = 0
+        self.budget_overruns = 0
+        self.budget_cuts = 0
+        self.cache = SearchCache(self.cache_size) if self.cache_size else None
+        self.planner.reset(self)
+
+    def end_game(self, cause):
+        self.alive = False
+        self.death_cause = cause
+        if self.score > self.high_score:
+            self.high_score = self.score
+        return cause
+
+    def step(self):
+        if not self.alive: return self.death_cause
+        return self.advance(self.get_ai_move())
+
+    def advance(self, next_move):
+        old_tail = self.body[-1]
+        self.last_tail = None
+
+        self.steps += 1
+        self.steps_since_food += 1
+        starvation_limit = self.grid_area * self.params.starve_factor
+
+        if self.steps_since_food > starvation_limit:
+            return self.end_game("starved")
+
+        if next_move is LOOPED:
+            return self.end_game("looped")
+
+        if not next_move:
+            self.killer_pos = self.body[0]
+            return self.end_game("trapped")
+
+        if self.recorder: self.recorder.record(self, next_move)
+        link_keys = self.link_keys
+        head_y, head_x = self.body[0]
+        self.body_hash ^= link_keys[self.cell_of(next_move) * 5 + DIRECTION_CODES[(head_y - next_move[0], head_x - next_move[1])]]
+        self.body.appendleft(next_move)
+        self.stamps[self.cell_of(next_move)] = self.steps
+        self.labels.occupy(self.cell_of(next_move))
+        if next_move == self.food:
+            self.occupy(self.cell_of(next_move))
+            self.score += 1
+            self.food = self.spawn_food()
+            self.steps_since_food = 0
+            self.state_steps.clear()
+            self.food_loops = 0
+            if self.food is None:
+                return self.end_game("cleared")
+            return "ate"
+        self.body.pop()
+        tail_y, tail_x = self.body[-1]
+        tail_cell = self.cell_of(self.body[-1])
+        self.body_hash ^= (link_keys[self.cell_of(old_tail) * 5 + 4] ^ link_keys[tail_cell * 5 + 4]
+                           ^ link_keys[tail_cell * 5 + DIRECTION_CODES[(old_tail[0] - tail_y, old_tail[1] - tail_x)]])
+        self.release(self.cell_of(old_tail))
+        self.occupy(self.cell_of(next_move))
+        self.labels.release(self.cell_of(self.body[-1]))
+        if old_tail != next_move: self.last_tail = old_tail
+        return "moved"
+
+    def clone(self):
+        other = object.__new__(SnakeGame)
+        for name in ("max_y", "max_x", "start_length", "incremental_labels", "plan_budget", "cache_size", "params",
+                     "seed", "score", "high_score", "steps", "steps_since_food", "alive", "game_over", "death_cause",
+                     "killer_pos", "plan_hits", "plan_misses", "budget_overruns", "budget_cuts", "cycles", "escape_until",
+                     "food_loops", "loop_start", "last_escape", "play_top", "play_bottom", "playable_area", "grid_area",
+                     "dynamic_limit", "offsets", "zobrist_keys", "link_keys", "zobrist", "body_hash", "food", "status_msg"):
+            setattr(other, name, getattr(self, name))
+        other.planner = type(self.planner)()
+        other.deadline = None
+        other.budget_cut = False
+        other.search_partial = False
+        other.search_stats = None
+        other.recorder = None
+        other.vision_path = []
+        other.state_steps = {}
+        other.last_tail = None
+        other.cache = SearchCache(self.cache_size) if self.cache_size else None
+        other.body = deque(self.body)
+        other.grid = bytearray(self.grid)
+        other.free_cells = array('i', self.free_cells)
+        other.free_index = array('i', self.free_index)
+        other.stamps = array('i', self.stamps)
+        other.degree = bytearray(self.degree)
+        other.alloc_search()
+        other.labels = self.labels.copy(other)
+        other.planner.reset(other)
+        return other
+
+    def load_state(self, body, food, steps=0, steps_since_food=0):
+        self.steps = steps
+        self.body = deque(body)
+        self.build_grid()
+        self.score = len(self.body) - self.start_length
+        self.food = food
+        self.steps_since_food = steps_since_food
+        self.state_steps.clear()
+        self.escape_until = -1
+        self.food_loops = 0
+        self.loop_start = -1
+        self.last_escape = -1
+        self.alive = True
+        self.game_over = False
+        self.death_cause = None
+        self.killer_pos = None
+        self.last_tail = None
+        self.vision_path = []
+        self.planner.reset(self)
+
+    def plan_hit_rate(self):
+        return self.plan_hits / max(1, self.plan_hits + self.plan_misses)
+
+    def cache_hit_rate(self):
+        if not self.cache: return 0.0
+        return self.cache.hits / max(1, self.cache.hits + self.cache.misses)
+
+    def play(self):
+        t0 = time.perf_counter()
+        while self.alive:
+            self.step()
+        elapsed = time.perf_counter() - t0
+        return {
+            "score": self.score,
+            "max_score": self.playable_area - self.start_length,
+            "steps": self.steps,
+            "starvation_resets": 1 if self.death_cause == "starved" else 0,
+            "cause": self.death_cause,
+            "killer_pos": self.killer_pos,
+            "plan_hit_rate": round(self.plan_hit_rate(), 4),
+            "cache_hit_rate": round(self.cache_hit_rate(), 4),
+            "budget_overruns": self.budget_overruns,
+            "budget_cuts": self.budget_cuts,
+            "cycles": self.cycles,
+            "elapsed": elapsed,
+        }
 
-        self.draw_ui()
-        self.draw_food()
-        self.draw_full_snake()
-
-    def print_centered(self, y, text, attr=0):
-        try:
-            h, w = self.stdscr.getmaxyx()
-            line = text.center(w)
-            if len(line) > w - 1:
-                line = line[:w-1]
-            if 0 <= y < h:
-                self.stdscr.addstr(y, 0, line, attr)
-        except: pass
+    def build_grid(self):
+        w = self.max_x
+        self.grid = bytearray([WALL]) * self.grid_area
+        for y in range(self.play_top, self.play_bottom + 1):
+            self.grid[y * w + 1:y * w + w - 1] = bytes(w - 2)
+        self.offsets = (-w, w, -1, 1)
+
+        self.free_cells = array('i')
+        self.free_index = array('i', [-1]) * self.grid_area
+        for y in range(self.play_top, self.play_bottom + 1):
+            n = len(self.free_cells)
+            self.free_index[y * w + 1:y * w + w - 1] = array('i', range(n, n + w - 2))
+            self.free_cells.extend(range(y * w + 1, y * w + w - 1))
+        free = int.from_bytes(self.grid.translate(FREE_MASK), 'little')
+        spread = (free << 8 * w) + (free >> 8 * w) + (free << 8) + (free >> 8)
+        self.degree = bytearray(spread.to_bytes(self.grid_area + w + 1, 'little')[:self.grid_area])
+        self.alloc_search()
+        self.zobrist_keys, self.link_keys = zobrist_keys(self.grid_area)
+        self.zobrist = 0
+        self.body_hash = 0
+        self.stamps = array('i', [-2 ** 30]) * self.grid_area
+        body = list(self.body)
+        for i, (y, x) in enumerate(body):
+            self.occupy(y * w + x)
+            self.stamps[y * w + x] = self.steps - i
+            self.body_hash ^= self.link_keys[(y * w + x) * 5 + self.link_of(body, i)]
+        self.labels = SpaceLabels(self, incremental=self.incremental_labels)
+
+    def alloc_search(self):
+        self.cell_bits = self.grid_area.bit_length()
+        self.g_score = array('i', [0]) * self.grid_area
+        self.came_from = array('i', [0]) * self.grid_area
+        self.seen = array('i', [0]) * self.grid_area
+        self.closed = array('i', [0]) * self.grid_area
+        self.search_id = 0
+
+    def link_of(self, body, i):
+        if i == len(body) - 1: return 4
+        (y, x), (ny, nx) = body[i], body[i + 1]
+        return DIRECTION_CODES[(ny - y, nx - x)]
+
+    def occupy(self, cell):
+        self.grid[cell] = BODY
+        i = self.free_index[cell]
+        if i < 0: return
+        self.zobrist ^= self.zobrist_keys[cell]
+        degree = self.degree
+        for o in self.offsets: degree[cell + o] -= 1
+        last = self.free_cells.pop()
+        if last != cell:
+            self.free_cells[i] = last
+            self.free_index[last] = i
+        self.free_index[cell] = -1
+
+    def release(self, cell):
+        self.grid[cell] = FREE
+        if self.free_index[cell] >= 0: return
+        self.zobrist ^= self.zobrist_keys[cell]
+        degree = self.degree
+        for o in self.offsets: degree[cell + o] += 1
+        self.free_index[cell] = len(self.free_cells)
+        self.free_cells.append(cell)
+
+    def cell_of(self, pos):
+        return pos[0] * self.max_x + pos[1]
+
+    def pos_of(self, cell):
+        return divmod(cell, self.max_x)
 
     def spawn_food(self):
+        if not self.free_cells: return None
+        rng = random.Random(f"{self.seed}/{self.score}")
         fill_ratio = len(self.body) / max(1, self.grid_area)
-        pad = 2 if fill_ratio < 0.50 else 0
-
-        attempts = 0
-        while attempts < 500:
-            attempts += 1
-            min_y = self.play_top + pad
-            max_y = self.play_bottom - pad
-            min_x = 1 + pad
-            max_x = self.max_x - 2 - pad
-
-            if max_y <= min_y or max_x <= min_x:
-                min_y, max_y = self.play_top, self.play_bottom
-                min_x, max_x = 1, self.max_x - 2
-
-            fy = random.randint(min_y, max_y)
-            fx = random.randint(min_x, max_x)
-
-            if (fy, fx) not in self.body:
-                neighbors = self.get_neighbors((fy, fx), self.body)
-                if len(neighbors) > 0:
-                    return (fy, fx)
-        return (self.play_top, 1)
+        pad = self.params.food_pad if fill_ratio < self.params.food_pad_fill else 0
+
+        min_y = self.play_top + pad
+        max_y = self.play_bottom - pad
+        min_x = 1 + pad
+        max_x = self.max_x - 2 - pad
+
+        if max_y <= min_y or max_x <= min_x:
+            min_y, max_y = self.play_top, self.play_bottom
+            min_x, max_x = 1, self.max_x - 2
+
+        def valid(cell):
+            fy, fx = divmod(cell, self.max_x)
+            if not (min_y <= fy <= max_y and min_x <= fx <= max_x): return False
+            return any(self.grid[cell + o] == FREE for o in self.offsets)
+
+        grid = self.grid
+        for _ in range(64):
+            cell = rng.randint(min_y, max_y) * self.max_x + rng.randint(min_x, max_x)
+            if grid[cell] == FREE and valid(cell):
+                return self.pos_of(cell)
+
+        free_cells = sorted(self.free_cells)
+        candidates = [c for c in free_cells if valid(c)]
+        if not candidates:
+            min_y, max_y = self.play_top, self.play_bottom
+            min_x, max_x = 1, self.max_x - 2
+            candidates = [c for c in free_cells if valid(c)] or free_cells
+        return self.pos_of(rng.choice(candidates))
 
     def heuristic_simple(self, a, b):
         return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-    def heuristic_hunt(self, a, b, obstacles_set=None):
-        cost = abs(a[0] - b[0]) + abs(a[1] - b[1])
-        if obstacles_set:
-            y, x = a
-            empty_neighbors = 0
-            for dy, dx in [(-1,0), (1,0), (0,-1), (0,1)]:
-                ny, nx = y + dy, x + dx
-                if not (self.play_top <= ny <= self.play_bottom and 0 < nx < self.max_x - 1):
-                    continue
-                if (ny, nx) in obstacles_set:
-                    continue
-                empty_neighbors += 1
-            cost += empty_neighbors * 1.5
-        return cost
-
-    def get_neighbors(self, node, body_obstacles):
-        y, x = node
-        neighbors = []
-        obstacles_set = set(body_obstacles)
-        for dy, dx in [(-1,0), (1,0), (0,-1), (0,1)]:
-            ny, nx = y + dy, x + dx
-            if self.play_top <= ny <= self.play_bottom and 0 < nx < self.max_x - 1:
-                if (ny, nx) not in obstacles_set:
-                    neighbors.append((ny, nx))
-        return neighbors
-
-    def a_star(self, start, goal, body_obstacles, max_steps=None, use_complex_heuristic=False):
-        if max_steps is None: max_steps = self.dynamic_limit
-        frontier = PriorityQueue()
-        frontier.put(start, 0)
-        came_from = {start: None}
-        cost_so_far = {start: 0}
+    def get_neighbors(self, node):
+        c = node[0] * self.max_x + node[1]
+        grid = self.grid
+        return [self.pos_of(c + o) for o in self.offsets if grid[c + o] == FREE]
 
-        obstacles_set = set(body_obstacles)
-        steps = 0
+    def cached(self, key, search, *args):
+        value = self.cache.get(key)
+        if value is MISSING:
+            value = search(*args)
+            if not self.budget_cut: self.cache.put(key, value)
+        return value
 
-        while not frontier.empty():
+    def a_star(self, start, goal, max_steps=None, use_complex_heuristic=False):
+        if max_steps is None: max_steps = self.dynamic_limit
+        if not self.cache: return self.search_path(start, goal, max_steps, use_complex_heuristic)
+        self.search_partial = False
+        return self.cached(("a_star", self.zobrist, start, goal, max_steps, use_complex_heuristic),
+                           self.search_path, start, goal, max_steps, use_complex_heuristic)
+
+    def search_path(self, start, goal, max_steps, use_complex_heuristic):
+        w = self.max_x
+        grid = self.grid
+        offsets = self.offsets
+        degree = self.degree
+        weight = self.params.hunt_degree_weight
+        g_score = self.g_score
+        came_from = self.came_from
+        seen = self.seen
+        closed = self.closed
+        bits = self.cell_bits
+        mask = (1 << bits) - 1
+        self.search_id += 1
+        mark = self.search_id
+        start_cell = start[0] * w + start[1]
+        goal_cell = goal[0] * w + goal[1]
+        gy, gx = goal
+
+        h = abs(start[0] - gy) + abs(start[1] - gx)
+        heap = [(h << bits | h) << (bits + 3) | start_cell]
+        seen[start_cell] = mark
+        g_score[start_cell] = 0
+        steps = 0
+        peak = 1
+
+        timed = self.deadline is not None
+        timed_out = False
+        best_cell, best_h = start_cell, h
+        self.search_partial = False
+        found = False
+
+        while heap:
+            if len(heap) > peak: peak = len(heap)
+            current = heappop(heap) & mask
+            if closed[current] == mark: continue
+            closed[current] = mark
             steps += 1
             if steps > max_steps: break
-            current = frontier.get()
-            if current == goal: break
-
-            y, x = current
-            for dy, dx in [(-1,0), (1,0), (0,-1), (0,1)]:
-                ny, nx = y + dy, x + dx
-                if self.play_top <= ny <= self.play_bottom and 0 < nx < self.max_x - 1:
-                    if (ny, nx) not in obstacles_set:
-                        new_cost = cost_so_far[current] + 1
-                        if (ny, nx) not in cost_so_far or new_cost < cost_so_far[(ny, nx)]:
-                            cost_so_far[(ny, nx)] = new_cost
-                            if use_complex_heuristic:
-                                priority = new_cost + self.heuristic_hunt(goal, (ny, nx), obstacles_set)
-                            else:
-                                priority = new_cost + self.heuristic_simple(goal, (ny, nx))
-                            frontier.put((ny, nx), priority)
-                            came_from[(ny, nx)] = current
-
-        if goal not in came_from: return None
+            if timed and not steps & 127 and self.out_of_time():
+                timed_out = True
+                break
+            if current == goal_cell:
+                found = True
+                break
+            if timed:
+                cy, cx = divmod(current, w)
+                h = abs(cy - gy) + abs(cx - gx)
+                if h < best_h: best_cell, best_h = current, h
+
+            g = g_score[current] + 1
+            for o in offsets:
+                n = current + o
+                if grid[n] != FREE or closed[n] == mark: continue
+                if seen[n] == mark and g >= g_score[n]: continue
+                seen[n] = mark
+                g_score[n] = g
+                came_from[n] = current
+                ny, nx = divmod(n, w)
+                h = abs(ny - gy) + abs(nx - gx)
+                if use_complex_heuristic: key = ((g + h + weight * degree[n]) << bits | h) << 3 | degree[n]
+                else: key = ((g + h) << bits | h) << 3
+                heappush(heap, key << bits | n)
+
+        self.search_stats = (min(steps, max_steps), peak, steps > max_steps or timed_out)
+        if not found:
+            if not timed_out or best_cell == start_cell: return None
+            goal_cell = best_cell
+            self.search_partial = True
         path = []
-        current = goal
-        while current != start:
-            path.append(current)
+        current = goal_cell
+        while current != start_cell:
+            path.append(divmod(current, w))
             current = came_from[current]
         path.reverse()
         return path
 
-    def flood_fill(self, start, body_obstacles, max_depth=None):
+    def flood_fill(self, start, max_depth=None):
         if max_depth is None: max_depth = self.grid_area
-        queue = deque([start])
-        visited = {start}
+        if not self.cache: return self.count_region(start, max_depth)
+        return self.cached(("flood_fill", self.zobrist, start, max_depth), self.count_region, start, max_depth)
+
+    def count_region(self, start, max_depth):
+        grid = self.grid
+        offsets = self.offsets
+        seen = self.seen
+        self.search_id += 1
+        mark = self.search_id
+        start_cell = start[0] * self.max_x + start[1]
+        queue = deque([start_cell])
+        seen[start_cell] = mark
         count = 0
-        obstacles_set = set(body_obstacles)
+        peak = 1
         while queue:
+            if len(queue) > peak: peak = len(queue)
             curr = queue.popleft()
             count += 1
-            if count >= max_depth: return count
-            for n in self.get_neighbors(curr, []):
-                if n not in obstacles_set and n not in visited:
-                    visited.add(n)
+            if count >= max_depth:
+                self.search_stats = (count, peak, True)
+                return count
+            for o in offsets:
+                n = curr + o
+                if grid[n] == FREE and seen[n] != mark:
+                    seen[n] = mark
                     queue.append(n)
+        self.search_stats = (count, peak, False)
         return count
 
+    def distance_field(self, source):
+        if np is not None and self.grid_area >= NUMPY_MIN_AREA:
+            return self.distance_field_numpy(source)
+        grid = self.grid
+        offsets = self.offsets
+        dist = array('i', [-1]) * self.grid_area
+        start_cell = source[0] * self.max_x + source[1]
+        dist[start_cell] = 0
+
+        frontier = [start_cell]
+        d = 0
+        reached = peak = 1
+        while frontier:
+            d += 1
+            next_frontier = []
+            for c in frontier:
+                for o in offsets:
+                    n = c + o
+                    if grid[n] == FREE and dist[n] < 0:
+                        dist[n] = d
+                        next_frontier.append(n)
+            frontier = next_frontier
+            reached += len(frontier)
+            if len(frontier) > peak: peak = len(frontier)
+        self.search_stats = (reached, peak, False)
+        return dist
+
+    def distance_field_numpy(self, source):
+        w = self.max_x
+        unvisited = np.frombuffer(self.grid, dtype=np.uint8) == FREE
+        dist = np.full(self.grid_area, -1, dtype=np.int32)
+        frontier = np.zeros(self.grid_area, dtype=bool)
+        start_cell = source[0] * w + source[1]
+        frontier[start_cell] = True
+        unvisited[start_cell] = False
+        dist[start_cell] = 0
+
+        reached = np.empty_like(frontier)
+        d = 0
+        total = peak = 1
+        while True:
+            d += 1
+            reached[:] = False
+            reached[w:] |= frontier[:-w]
+            reached[:-w] |= frontier[w:]
+            reached[1:] |= frontier[:-1]
+            reached[:-1] |= frontier[1:]
+            reached &= unvisited
+            count = int(np.count_nonzero(reached))
+            if not count: break
+            total += count
+            peak = max(peak, count)
+            unvisited &= ~reached
+            dist[reached] = d
+            frontier, reached = reached, frontier
+        self.search_stats = (total, peak, False)
+        return dist.tolist()
+
+    def trace_field(self, field, start):
+        offsets = self.offsets
+        c = start[0] * self.max_x + start[1]
+        d = field[c]
+        path = []
+        while d > 0:
+            d -= 1
+            for o in offsets:
+                if field[c + o] == d:
+                    c += o
+                    break
+            path.append(self.pos_of(c))
+        return path
+
     def is_move_safe(self, move):
-        virtual_body = list(self.body)
-        virtual_body.insert(0, move)
-        if move == self.food: pass
-        else: virtual_body.pop()
-        future_head = virtual_body[0]
-        future_tail = virtual_body[-1]
-        future_obstacles = virtual_body[:-1]
-        if self.a_star(future_head, future_tail, future_obstacles, max_steps=self.dynamic_limit, use_complex_heuristic=False):
-            return True
-        return False
+        return self.is_path_fully_safe([move])
 
     def is_path_fully_safe(self, path):
         if not path: return False
-        virtual_body = list(self.body)
-        for step in path:
-            virtual_body.insert(0, step)
-            if step != self.food: virtual_body.pop()
-        virtual_head = virtual_body[0]
-        virtual_tail = virtual_body[-1]
-        virtual_obstacles = virtual_body[:-1]
-        check_path = self.a_star(virtual_head, virtual_tail, virtual_obstacles, max_steps=self.dynamic_limit, use_complex_heuristic=False)
-        return True if check_path else False
+        if not self.cache: return self.check_path(path)
+        return self.cached(("safe", self.body_hash, tuple(path), self.food in path), self.check_path, path)
+
+    def check_path(self, path):
+        w = self.max_x
+        stamps = self.stamps
+        length = len(self.body) + (1 if self.food in path else 0)
+
+        saved = []
+        for j, (y, x) in enumerate(path):
+            c = y * w + x
+            saved.append((c, stamps[c]))
+            stamps[c] = self.steps + j + 1
+        try:
+            return self.can_reach_tail(path[-1], self.steps + len(path), length)
+        finally:
+            for c, old in saved:
+                stamps[c] = old
+
+    def can_reach_tail(self, head, now, length):
+        grid = self.grid
+        stamps = self.stamps
+        offsets = self.offsets
+        limit = now - length
+        seen = self.seen
+        self.search_id += 1
+        mark = self.search_id
+        head_cell = head[0] * self.max_x + head[1]
+
+        frontier = [head_cell]
+        seen[head_cell] = mark
+        t = 0
+        reached = peak = 1
+        while frontier:
+            t += 1
+            next_frontier = []
+            for c in frontier:
+                for o in offsets:
+                    n = c + o
+                    if seen[n] == mark or grid[n] == WALL: continue
+                    s = stamps[n]
+                    if s > limit:
+                        if s <= limit + t:
+                            self.search_stats = (reached, peak, False)
+                            return True
+                        continue
+                    seen[n] = mark
+                    next_frontier.append(n)
+            frontier = next_frontier
+            reached += len(frontier)
+            if len(frontier) > peak: peak = len(frontier)
+        self.search_stats = (reached, peak, False)
+        return False
+
+    def detect_cycle(self):
+        state = self.body_hash ^ self.zobrist_keys[self.cell_of(self.food)]
+        last = self.state_steps.get(state, self.steps)
+        self.state_steps[state] = self.steps
+        if last == self.steps: return 0
+        period = self.steps - last
+        if self.steps > self.escape_until:
+            self.cycles += 1
+            self.food_loops += 1
+            self.loop_start = self.steps
+        self.escape_until = self.steps + period
+        return (self.steps - max(self.loop_start, self.last_escape)) // period + 1
+
+    def find_escape(self, last_resort):
+        tail_cell = self.cell_of(self.body[-1])
+        self.release(tail_cell)
+        moves = self.get_neighbors(self.body[0])
+        self.occupy(tail_cell)
+        if len(moves) < 2: return None
+        best, best_key = None, None
+        horizon = min(self.escape_until - self.steps, ESCAPE_HORIZON)
+        for move in moves:
+            if self.out_of_time(): return None
+            sim = self.clone()
+            sim.escape_until = -1
+            sim.plan_budget = None
+            sim.advance(move)
+            while sim.alive and sim.score == self.score and sim.steps - self.steps < horizon:
+                if self.out_of_time(): return None
+                sim.step()
+            if sim.score == self.score: continue
+            ate = sim.steps - self.steps
+            while sim.alive and sim.steps - self.steps < ate + min(len(self.body), ESCAPE_HORIZON):
+                if self.out_of_time(): return None
+                sim.step()
+            if sim.death_cause == "trapped" and not last_resort: continue
+            key = (sim.death_cause != "trapped", sim.score, -ate)
+            if best_key is None or key > best_key:
+                best, best_key = move, key
+        return best
 
     def get_ai_move(self):
-        head = self.body[0]
-        self.head_history.append(head)
-        self.vision_path = []
+        lap = self.detect_cycle()
+        if lap > 2 or self.food_loops > 1:
+            self.status_msg = "Looping"
+            return LOOPED
+        t0 = time.perf_counter()
+        self.deadline = None if self.plan_budget is None else t0 + self.plan_budget
+        self.budget_cut = False
+        try:
+            move = self.find_escape(last_resort=lap == 2) if lap else None
+            if move:
+                self.last_escape = self.steps
+                self.status_msg = "Escaping"
+                return move
+            tail_cell = self.cell_of(self.body[-1])
+            self.release(tail_cell)
+            try:
+                return self.planner.plan(self)
+            finally:
+                self.occupy(tail_cell)
+        finally:
+            if self.deadline is not None and time.perf_counter() - t0 > self.plan_budget:
+                self.budget_overruns += 1
+
+    def out_of_time(self):
+        if self.deadline is None: return False
+        if self.budget_cut: return True
+        if time.perf_counter() < self.deadline: return False
+        self.budget_cut = True
+        self.budget_cuts += 1
+        return True
+
+class HeuristicPlanner:
+    name = "heuristic"
 
-        path_to_food = self.a_star(head, self.food, self.body[:-1], max_steps=self.dynamic_limit, use_complex_heuristic=True)
+    def __init__(self):
+        self.committed = deque()
+        self.committed_food = None
+        self.expected_head = None
+
+    def reset(self, game):
+        self.committed.clear()
+        self.committed_food = None
+        self.expected_head = None
+
+    def commit(self, game, path):
+        self.committed = deque(path)
+        self.committed_food = game.food
+        game.vision_path = self.committed
+        return self.follow()
+
+    def follow(self):
+        self.expected_head = self.committed.popleft()
+        return self.expected_head
+
+    def next_planned_move(self, game):
+        if not self.committed or self.committed_food != game.food: return None
+        if game.body[0] != self.expected_head: return None
+        move = self.committed[0]
+        head_y, head_x = game.body[0]
+        if abs(move[0] - head_y) + abs(move[1] - head_x) != 1: return None
+        if game.grid[game.cell_of(move)] != FREE: return None
+        return self.follow()
+
+    def plan(self, game):
+        head = game.body[0]
+
+        move = self.next_planned_move(game)
+        if move:
+            game.plan_hits += 1
+            return move
+        game.plan_misses += 1
+        self.committed.clear()
+        game.vision_path = []
+
+        path_to_food = game.a_star(head, game.food, max_steps=game.dynamic_limit, use_complex_heuristic=True)
         if path_to_food:
-            if self.is_path_fully_safe(path_to_food):
-                self.status_msg = "Hunting (Aggressive)"
-                self.vision_path = path_to_food
-                return path_to_food[0]
-
-        neighbors = self.get_neighbors(head, self.body[:-1])
-        neighbors.sort(key=lambda n: self.heuristic_simple(n, self.food))
-
+            if game.is_path_fully_safe(path_to_food):
+                game.status_msg = "Hunting (Partial)" if game.search_partial else "Hunting (Aggressive)"
+                return self.commit(game, path_to_food)
+
+        neighbors = game.get_neighbors(head)
+        neighbors.sort(key=lambda n: game.heuristic_simple(n, game.food))
+
+        food_dist = game.distance_field(game.food)
+        detours = [n for n in neighbors if food_dist[game.cell_of(n)] >= 0]
+        detours.sort(key=lambda n: food_dist[game.cell_of(n)])
+        for i, n in enumerate(detours):
+            if i and game.out_of_time(): break
+            full_detour = [n] + game.trace_field(food_dist, n)
+            if game.is_path_fully_safe(full_detour):
+                game.status_msg = "Hunting (Detour)"
+                return self.commit(game, full_detour)
+
+        tail_dist = game.distance_field(game.body[-1])
+        safe_moves = []
         for n in neighbors:
-            detour_path = self.a_star(n, self.food, self.body[:-1], max_steps=self.dynamic_limit, use_complex_heuristic=True)
-            if detour_path:
-                full_detour = [n] + detour_path
-                if self.is_path_fully_safe(full_detour):
-                    self.status_msg = "Hunting (Detour)"
-                    return n
-
-        safe_moves = [n for n in neighbors if self.is_move_safe(n)]
+            if tail_dist[game.cell_of(n)] >= 0:
+                safe_moves.append(n)
+            elif not (safe_moves and game.out_of_time()) and game.is_move_safe(n):
+                safe_moves.append(n)
         if safe_moves:
             best_move = None
             max_space = -1
             for move in safe_moves:
-                space_available = self.flood_fill(move, self.body[:-1])
+                space_available = game.labels.space(move)
                 if space_available > max_space:
                     max_space = space_available
                     best_move = move
                 elif space_available == max_space:
-                    d_tail_current = self.heuristic_simple(best_move, self.body[-1])
-                    d_tail_new = self.heuristic_simple(move, self.body[-1])
+                    d_tail_current = tail_dist[game.cell_of(best_move)]
+                    d_tail_new = tail_dist[game.cell_of(move)]
                     if d_tail_new > d_tail_current:
                         best_move = move
-            self.status_msg = f"Stalling (Space: {max_space})"
+            game.status_msg = f"Stalling (Space: {max_space})"
             return best_move
 
         if neighbors:
-            self.status_msg = "Panic!"
-            return max(neighbors, key=lambda n: self.flood_fill(n, self.body[:-1]))
-        self.status_msg = "Accepting Fate"
+            game.status_msg = "Panic!"
+            return max(neighbors, key=lambda n: game.labels.space(n))
+        game.status_msg = "Accepting Fate"
         return None
 
-    def get_render_char(self, curr, prev, nxt):
-        y, x = curr
-        if prev is None:
-            if not nxt: return "O "
-            ny, nx = nxt
-            if ny < y: return HEAD_CHARS['D']
-            if ny > y: return HEAD_CHARS['U']
-            if nx < x: return HEAD_CHARS['R']
-            if nx > x: return HEAD_CHARS['L']
-        if nxt is None: return TAIL_CHAR
-        neighbors = []
-        for node in [prev, nxt]:
-            ny, nx = node
-            if ny < y: neighbors.append('U')
-            elif ny > y: neighbors.append('D')
-            elif nx < x: neighbors.append('L')
-            elif nx > x: neighbors.append('R')
-        base = PIPE_MAP.get(frozenset(neighbors), ' ')
-        return WIDE_RENDER.get(base, '  ')
+CYCLE_CACHE = {}
 
-    def erase_at(self, y, x):
-        try: self.stdscr.addstr(y, x * 2, "  ")
+def hamiltonian_cycle(height, width):
+    key = (height, width)
+    if key in CYCLE_CACHE: return CYCLE_CACHE[key]
+
+    if height % 2 == 0: rows, cols, transpose = height, width, False
+    elif width % 2 == 0: rows, cols, transpose = width, height, True
+    else:
+        CYCLE_CACHE[key] = None
+        return None
+
+    path = [(0, c) for c in range(cols)]
+    for r in range(1, rows):
+        span = range(cols - 1, 0, -1) if r % 2 else range(1, cols)
+        path.extend((r, c) for c in span)
+    path.extend((r, 0) for r in range(rows - 1, 0, -1))
+    if transpose: path = [(c, r) for r, c in path]
+
+    board_w = width + 2
+    cycle = array('i', ((r + 1) * board_w + c + 1 for r, c in path))
+    order = array('i', [-1]) * ((height + 2) * board_w)
+    for i, c in enumerate(cycle):
+        order[c] = i
+    CYCLE_CACHE[key] = (cycle, order)
+    return CYCLE_CACHE[key]
+
+class HamiltonianPlanner:
+    name = "hamiltonian"
+
+    def __init__(self):
+        self.fallback = HeuristicPlanner()
+        self.cycle = None
+        self.order = None
+        self.aligned_steps = 0
+
+    def reset(self, game):
+        self.fallback.reset(game)
+        cycle = hamiltonian_cycle(game.play_bottom - game.play_top + 1, game.max_x - 2)
+        self.cycle, self.order = cycle if cycle else (None, None)
+        self.aligned_steps = 0
+
+    def plan(self, game):
+        if self.cycle is None: return self.fallback.plan(game)
+        cycle = self.cycle
+        order = self.order
+        size = len(cycle)
+        game.vision_path = []
+
+        head = game.cell_of(game.body[0])
+        head_i = order[head]
+        next_cell = cycle[(head_i + 1) % size]
+
+        if self.aligned_steps < len(game.body):
+            if game.grid[next_cell] == FREE and game.is_move_safe(game.pos_of(next_cell)):
+                self.aligned_steps += 1
+                game.status_msg = "Aligning"
+                return game.pos_of(next_cell)
+            self.aligned_steps = 0
+            return self.fallback.plan(game)
+
+        tail_gap = (order[game.cell_of(game.body[-1])] - head_i) % size
+        food_gap = (order[game.cell_of(game.food)] - head_i) % size
+        best, best_gap = next_cell, 1
+        for o in game.offsets:
+            n = head + o
+            if game.grid[n] != FREE: continue
+            gap = (order[n] - head_i) % size
+            if best_gap < gap <= food_gap and gap < tail_gap:
+                best, best_gap = n, gap
+        game.status_msg = "Cycling (Shortcut)" if best_gap > 1 else "Cycling"
+        return game.pos_of(best)
+
+PLANNERS = {"heuristic": HeuristicPlanner, "hamiltonian": HamiltonianPlanner}
+
+class Profiler:
+    def __init__(self, path=None):
+        self.out = open(path, 'a') if path else None
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.slowest = {}
+        self.shown = {}
+
+    def attach(self, obj, names):
+        for name in names:
+            setattr(obj, name, self.timed(obj, name, getattr(obj, name)))
+
+    def detach(self, obj, names):
+        for name in names: vars(obj).pop(name, None)
+
+    def attach_game(self, game):
+        self.attach(game, PROFILE_SEARCHES)
+        get_move = self.timed(game, "tick", game.get_ai_move, searched=False)
+        def ticked():
+            try: return get_move()
+            finally: self.flush("tick", game.steps, PROFILE_SEARCHES + ("tick",))
+        game.get_ai_move = ticked
+
+    def timed(self, obj, name, fn, searched=True):
+        clock = time.perf_counter
+        def wrapper(*args, **kwargs):
+            obj.search_stats = None
+            t0 = clock()
+            try: return fn(*args, **kwargs)
+            finally: self.record(name, clock() - t0, obj.search_stats if searched else None)
+        return wrapper
+
+    def record(self, name, elapsed, stats):
+        with self.lock:
+            entry = self.pending.setdefault(name, [0, 0.0, 0, 0, 0])
+            entry[0] += 1
+            entry[1] += elapsed
+            if stats:
+                expanded, peak, truncated = stats
+                entry[2] += expanded
+                entry[3] = max(entry[3], peak)
+                entry[4] += truncated
+
+    def flush(self, kind, step, names):
+        with self.lock:
+            sections = {name: self.pending.pop(name) for name in names if name in self.pending}
+            record = {"kind": kind, "step": step}
+            for name, (calls, elapsed, expanded, peak, truncated) in sections.items():
+                record[name] = {"calls": calls, "ms": round(elapsed * 1000, 3), "expanded": expanded,
+                                "peak": peak, "truncated": truncated}
+            slowest = self.slowest.get(kind)
+            if slowest is None or self.total(slowest) <= self.total(record):
+                self.slowest[kind] = record
+            if self.out: self.out.write(json.dumps(record) + "\n")
+
+    def total(self, record):
+        entry = record.get("tick") or record.get("render")
+        return entry["ms"] if entry else 0.0
+
+    def overlay(self):
+        parts = []
+        for kind in ("tick", "frame"):
+            with self.lock:
+                record = self.slowest.pop(kind, None) or self.shown.get(kind)
+            if not record: continue
+            self.shown[kind] = record
+            text = f"{kind} {self.total(record):.2f}ms"
+            for name, entry in record.items():
+                if name in ("kind", "step", "tick", "render"): continue
+                text += f" {PROFILE_LABELS[name]} {entry['calls']}x {entry['ms']:.2f}ms"
+                if entry["expanded"]: text += f" {entry['expanded']}n/{entry['peak']}"
+                if entry["truncated"]: text += "!"
+            parts.append(text)
+        return " | ".join(parts)
+
+    def close(self):
+        if self.out: self.out.close()
+
+def pack_codes(codes):
+    packed = bytearray((len(codes) + 3) // 4)
+    for i, code in enumerate(codes):
+        packed[i >> 2] |= code << ((i & 3) << 1)
+    return packed
+
+def unpack_codes(packed, count):
+    return bytearray((packed[i >> 2] >> ((i & 3) << 1)) & 3 for i in range(count))
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class Replay:
+    HEADER = struct.Struct("<4sBHHqIIIB")
+    KEYFRAME = struct.Struct("<IHHhhII")
+
+    def __init__(self, max_y, max_x, seed):
+        self.max_y = max_y
+        self.max_x = max_x
+        self.seed = seed
+        self.moves = bytearray()
+        self.keyframes = []
+        self.score = 0
+        self.cause = None
+
+    def record(self, game, move):
+        step = len(self.moves)
+        if not step % KEYFRAME_INTERVAL:
+            (hy, hx), food = game.body[0], game.food or (-1, -1)
+            self.keyframes.append((step, hy, hx, food[0], food[1], game.score, game.steps_since_food - 1))
+        self.moves.append(DIRECTION_CODES[(move[0] - game.body[0][0], move[1] - game.body[0][1])])
+
+    def finish(self, game):
+        self.score = game.score
+        self.cause = game.death_cause
+
+    def save(self, path):
+        moves = self.moves
+        with open(path, 'wb') as f:
+            f.write(self.HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.max_y, self.max_x, self.seed,
+                                     len(moves), len(self.keyframes), self.score, END_CAUSES.index(self.cause)))
+            f.write(pack_codes(moves))
+            for keyframe in self.keyframes:
+                f.write(self.KEYFRAME.pack(*keyframe))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, max_y, max_x, seed, count, keyframes, score, cause = cls.HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a snaky replay")
+        replay = cls(max_y, max_x, seed)
+        replay.score = score
+        replay.cause = END_CAUSES[cause]
+        offset = cls.HEADER.size
+        packed = data[offset:offset + (count + 3) // 4]
+        replay.moves = unpack_codes(packed, count)
+        offset += len(packed)
+        replay.keyframes = [cls.KEYFRAME.unpack_from(data, offset + i * cls.KEYFRAME.size) for i in range(keyframes)]
+        return replay
+
+    def filename(self):
+        return f"{self.max_y - 2}x{self.max_x - 2}-{self.seed}.snkr"
+
+    def move_at(self, game, step):
+        dy, dx = DIRECTIONS[self.moves[step]]
+        hy, hx = game.body[0]
+        return hy + dy, hx + dx
+
+    def seek(self, game, step):
+        if not self.keyframes:
+            game.reset_board()
+            return
+        step = max(0, min(step, len(self.moves)))
+        kstep, hy, hx, fy, fx, score, since = self.keyframes[min(step // KEYFRAME_INTERVAL, len(self.keyframes) - 1)]
+        length = game.start_length + score
+        body = [(hy, hx)]
+        for i in range(kstep - 1, max(-1, kstep - length), -1):
+            dy, dx = DIRECTIONS[self.moves[i]]
+            hy, hx = hy - dy, hx - dx
+            body.append((hy, hx))
+        cy, cx = game.max_y // 2, game.max_x // 2
+        body.extend((cy, cx - i) for i in range(1, length - len(body) + 1))
+
+        game.load_state(body, None if fy < 0 else (fy, fx), kstep, since)
+        self.play(game, step)
+
+    def play(self, game, step):
+        while game.steps < step and game.alive:
+            game.advance(self.move_at(game, game.steps))
+
+    def end_move(self):
+        return LOOPED if self.cause == "looped" else None
+
+    def play_out(self, game):
+        self.play(game, len(self.moves))
+        if game.alive and self.cause in ("starved", "trapped", "looped"): game.advance(self.end_move())
+
+    def verify(self, game):
+        mismatches = 0
+        self.seek(game, 0)
+        for step, hy, hx, fy, fx, score, _ in self.keyframes:
+            self.play(game, step)
+            if (game.body[0], game.food or (-1, -1), game.score) != ((hy, hx), (fy, fx), score):
+                mismatches += 1
+        self.play_out(game)
+        return mismatches
+
+class Snapshot:
+    HEADER = struct.Struct("<4sBHHqIIIiIIH")
+    HIGH_SCORE = struct.Struct("<HHI")
+
+    def __init__(self, max_y, max_x, seed):
+        self.max_y = max_y
+        self.max_x = max_x
+        self.seed = seed
+        self.games = 1
+        self.steps = 0
+        self.steps_since_food = 0
+        self.food = None
+        self.body = []
+        self.high_scores = {}
+
+    @classmethod
+    def capture(cls, game):
+        snapshot = cls(game.max_y, game.max_x, game.seed)
+        snapshot.games = game.games
+        snapshot.steps = game.steps
+        snapshot.steps_since_food = game.steps_since_food
+        snapshot.food = game.food
+        snapshot.body = list(game.body)
+        snapshot.high_scores = game.best_scores()
+        return snapshot
+
+    def encode(self):
+        w = self.max_x
+        codes = {-w: 0, w: 1, -1: 2, 1: 3}
+        cells = [y * w + x for y, x in self.body]
+        links = [codes[b - a] for a, b in zip(cells, cells[1:])]
+        food = -1 if self.food is None else self.food[0] * w + self.food[1]
+        data = bytearray(self.HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.max_y, self.max_x, self.seed,
+                                          self.games, self.steps, self.steps_since_food, food, cells[0], len(cells),
+                                          len(self.high_scores)))
+        data += pack_codes(links)
+        for (height, width), score in sorted(self.high_scores.items()):
+            data += self.HIGH_SCORE.pack(height, width, score)
+        return data
+
+    def save(self, path):
+        write_atomic(path, self.encode())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        (magic, version, max_y, max_x, seed, games, steps, since, food, head, length,
+         scores) = cls.HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a snaky snapshot")
+        snapshot = cls(max_y, max_x, seed)
+        snapshot.games = games
+        snapshot.steps = steps
+        snapshot.steps_since_food = since
+        snapshot.food = None if food < 0 else divmod(food, max_x)
+        offset = cls.HEADER.size
+        packed = data[offset:offset + (length + 2) // 4]
+        cell = head
+        cells = [cell]
+        for code in unpack_codes(packed, length - 1):
+            cell += (-max_x, max_x, -1, 1)[code]
+            cells.append(cell)
+        snapshot.body = [divmod(cell, max_x) for cell in cells]
+        offset += len(packed)
+        for i in range(scores):
+            h, w, score = cls.HIGH_SCORE.unpack_from(data, offset + i * cls.HIGH_SCORE.size)
+            snapshot.high_scores[(h, w)] = score
+        return snapshot
+
+    def restore(self, game):
+        game.load_state(self.body, self.food, self.steps, self.steps_since_food)
+
+class PlanWorker(threading.Thread):
+    def __init__(self, ui, depth=PLAN_QUEUE_DEPTH):
+        super().__init__(daemon=True)
+        self.ui = ui
+        self.moves = queue.Queue(maxsize=depth)
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.generation = 0
+        self.sim = None
+        self.running = True
+        self.invalidations = 0
+
+    def restart(self, game):
+        with self.lock:
+            self.generation += 1
+            self.sim = game.clone()
+            if self.ui.profiler: self.ui.profiler.attach_game(self.sim)
+            self.drain()
+        self.wake.set()
+
+    def invalidate(self, game):
+        self.invalidations += 1
+        self.restart(game)
+
+    def drain(self):
+        while True:
+            try: self.moves.get_nowait()
+            except queue.Empty: return
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        self.join(timeout=1)
+
+    def run(self):
+        while self.running:
+            with self.lock:
+                generation, sim = self.generation, self.sim
+            if sim is None or not sim.alive:
+                self.wake.wait(0.05)
+                self.wake.clear()
+                continue
+
+            sim.plan_budget = self.ui.plan_budget + self.moves.qsize() * self.ui.speed_delay
+            move = sim.get_ai_move()
+            vision = list(sim.vision_path) if self.ui.show_vision else []
+            status = sim.status_msg
+            sim.advance(move)
+            cache = sim.cache
+            record = (generation, move, sim.food, status, vision,
+                      (sim.plan_hits, sim.plan_misses, sim.budget_overruns,
+                       cache.hits if cache else 0, cache.misses if cache else 0, sim.cycles))
+
+            while self.running and generation == self.generation:
+                try:
+                    self.moves.put(record, timeout=0.05)
+                    break
+                except queue.Full:
+                    continue
+
+    def next_move(self):
+        while True:
+            try: record = self.moves.get_nowait()
+            except queue.Empty: return None
+            if record[0] == self.generation: return record
+
+class SnakeAI(SnakeGame):
+    CONTROLS = " [▲/▼] Speed  [R] Reset  [SPACE] Pause  [V] Vision  [M] Map  [P] Profile  [Q] Quit  [H] Hide UI "
+
+    def __init__(self, stdscr, args):
+        self.stdscr = stdscr
+
+        self.resolve_speed(args.speed)
+        self.show_vision = args.vision
+        self.hide_ui = args.hide_ui
+        self.show_minimap = args.minimap
+        self.board_arg = args.size
+        snapshot = self.open_snapshot(args)
+        self.high_scores = dict(snapshot.high_scores) if snapshot else {}
+        self.resumed = snapshot if args.resume else None
+
+        th, tw = self.screen = stdscr.getmaxyx()
+        if th < 10 or tw // 2 < 10:
+            raise Exception(f"Terminal too small! ({th}x{tw // 2})")
+        y, x = (snapshot.max_y, snapshot.max_x) if self.resumed else self.board_size()
+        self.top = self.left = 0
+        self.framed = False
+        self.minimap = None
+        self.minimap_at = 0
+
+        self.paused = False
+        self.dirty = set()
+        self.drawn_vision = set()
+        self.moved = 0
+        self.ui_key = None
+        self.rate = 0
+        self.profile_out = args.profile_out
+        self.profiler = Profiler(args.profile_out) if args.profile_out else None
+        self.show_profile = False
+        self.base_seed = args.seed
+        self.games = 0
+        self.record_dir = args.record
+        self.worker = None
+        super().__init__(y, x, planner=PLANNERS[args.planner](), plan_budget=self.plan_budget, cache_size=args.cache,
+                         params=args.params)
+        if self.profiler: self.profiler.attach(self, PROFILE_DRAWS)
+        self.reset(first_launch=True)
+        self.worker = self.create_worker()
+
+    def board_size(self):
+        if self.board_arg: return self.board_arg[0] + 2, self.board_arg[1] + 2
+        y, x = self.stdscr.getmaxyx()
+        return y, x // 2
+
+    def open_snapshot(self, args):
+        self.snapshot_path = args.resume or DEFAULT_SNAPSHOT
+        self.snapshot_writer = None
+        self.snapshot_at = time.perf_counter()
+        self.kept_board = None
+        if not os.path.exists(self.snapshot_path): return None
+        if args.resume: return Snapshot.load(self.snapshot_path)
+        try:
+            self.kept_board = Snapshot.load(self.snapshot_path)
+        except (OSError, ValueError, struct.error):
+            self.snapshot_path = None
+        return self.kept_board
+
+    def best_scores(self):
+        size = (self.max_y - 2, self.max_x - 2)
+        scores = dict(self.high_scores)
+        best = max(scores.get(size, 0), self.high_score, self.score)
+        if best: scores[size] = best
+        return scores
+
+    def save_snapshot(self):
+        if not self.snapshot_path: return
+        if self.snapshot_writer: self.snapshot_writer.join()
+        self.write_snapshot(self.capture_snapshot())
+
+    def autosave(self, now):
+        if not self.snapshot_path or now - self.snapshot_at < SNAPSHOT_INTERVAL: return
+        if self.snapshot_writer and self.snapshot_writer.is_alive(): return
+        self.snapshot_at = now
+        self.snapshot_writer = threading.Thread(target=self.write_snapshot, args=(self.capture_snapshot(),), daemon=True)
+        self.snapshot_writer.start()
+
+    def capture_snapshot(self):
+        if not self.kept_board: return Snapshot.capture(self)
+        self.kept_board.high_scores = self.best_scores()
+        return self.kept_board
+
+    def write_snapshot(self, snapshot):
+        try: snapshot.save(self.snapshot_path)
+        except OSError: pass
+
+    def create_worker(self):
+        worker = PlanWorker(self)
+        worker.restart(self)
+        return worker
+
+    def resolve_speed(self, arg_speed):
+        self.speed_idx = speed_index(arg_speed)
+        self.update_speed()
+
+    def update_speed(self):
+        self.speed_name = SPEED_LIST[self.speed_idx]
+        self.speed_delay = SPEEDS[self.speed_name]
+        self.plan_budget = self.speed_delay * PLAN_BUDGET_SHARE
+        self.frame_delay = max(self.speed_delay, 1 / MAX_FPS)
+        self.steps_per_frame = max(1, round(self.frame_delay / self.speed_delay))
+        self.max_catch_up = self.steps_per_frame * CATCH_UP_FRAMES
+        self.lag = 0.0
+
+    def change_speed(self, delta):
+        new_idx = self.speed_idx + delta
+        if 0 <= new_idx < len(SPEED_LIST):
+            self.speed_idx = new_idx
+            self.update_speed()
+
+    def reset(self, first_launch=False):
+        self.save_recording()
+        self.high_scores = self.best_scores()
+        snapshot, self.resumed = self.resumed, None
+        if snapshot:
+            self.max_y, self.max_x = snapshot.max_y, snapshot.max_x
+            self.seed, self.games = snapshot.seed, snapshot.games
+        else:
+            self.max_y, self.max_x = self.board_size()
+            if self.base_seed is not None: self.seed = self.base_seed + self.games
+            elif not first_launch: self.seed = random.randrange(1 << 32)
+            self.games += 1
+        self.reset_board()
+        self.high_score = self.high_scores.get((self.max_y - 2, self.max_x - 2), 0)
+        if snapshot: snapshot.restore(self)
+        elif self.record_dir: self.recorder = Replay(self.max_y, self.max_x, self.seed)
+        self.redraw()
+        if self.worker: self.worker.restart(self)
+
+    def save_recording(self):
+        if not self.recorder or not self.recorder.moves: return
+        self.recorder.finish(self)
+        os.makedirs(self.record_dir, exist_ok=True)
+        self.recorder.save(os.path.join(self.record_dir, self.recorder.filename()))
+
+    def update_view(self):
+        th, tw = self.screen = self.stdscr.getmaxyx()
+        hy, hx = self.body[0]
+        top = scroll_offset(hy, self.top, th, self.max_y)
+        left = scroll_offset(hx, self.left, tw // 2, self.max_x)
+        self.framed = (self.max_y, self.max_x) != (th, tw // 2)
+        moved = (top, left) != (self.top, self.left)
+        self.top, self.left = top, left
+        return moved
+
+    def redraw(self, clear=True):
+        self.update_view()
+        if clear: self.stdscr.clear()
+        else: self.stdscr.erase()
+        self.dirty.clear()
+        self.drawn_vision = set()
+        self.moved = 0
+        self.ui_key = None
+        self.minimap = None
+
+        self.draw_ui()
+        self.draw_food()
+        self.draw_board()
+
+    def print_centered(self, y, text, attr=0):
+        try:
+            h, w = self.stdscr.getmaxyx()
+            line = text.center(w)
+            if len(line) > w - 1:
+                line = line[:w-1]
+            if 0 <= y < h:
+                self.stdscr.addstr(y, 0, line, attr)
         except: pass
 
+    def put(self, pos, text, attr=0):
+        y, x = pos[0] - self.top, pos[1] - self.left
+        if 0 < y < self.screen[0] - 1 and 0 <= x < self.screen[1] // 2:
+            try: self.stdscr.addstr(y, x * 2, text, attr)
+            except: pass
+
+    def erase_at(self, y, x):
+        self.put((y, x), "  ")
+
     def draw_segment(self, i):
-        y, x = self.body[i]
-        attr = curses.color_pair(1)
-        if i == 0: attr |= curses.A_BOLD
-        if self.game_over and (y, x) == self.killer_pos: attr = curses.color_pair(2) | curses.A_BOLD
         prev = self.body[i-1] if i > 0 else None
         nxt = self.body[i+1] if i < len(self.body) - 1 else None
-        char = self.get_render_char((y, x), prev, nxt)
-        try: self.stdscr.addstr(y, x * 2, char, attr)
-        except: pass
+        self.draw_body_cell(i == 0, self.body[i], prev, nxt)
 
-    def draw_full_snake(self):
-        for i in range(len(self.body)): self.draw_segment(i)
+    def draw_body_cell(self, is_head, pos, prev, nxt):
+        y, x = pos
+        attr = curses.color_pair(1)
+        if is_head: attr |= curses.A_BOLD
+        if self.game_over and (y, x) == self.killer_pos: attr = curses.color_pair(2) | curses.A_BOLD
+        self.put(pos, render_char((y, x), prev, nxt), attr)
+
+    def draw_cell(self, cell):
+        grid, stamps = self.grid, self.stamps
+        stamp = stamps[cell]
+        prev = nxt = None
+        for o in self.offsets:
+            n = cell + o
+            if grid[n] != BODY: continue
+            if stamps[n] == stamp + 1: prev = self.pos_of(n)
+            elif stamps[n] == stamp - 1: nxt = self.pos_of(n)
+        self.draw_body_cell(stamp == self.steps, self.pos_of(cell), prev, nxt)
+
+    def draw_board(self):
+        grid, w = self.grid, self.max_x
+        th, tw = self.screen
+        for y in range(max(0, self.top + 1), min(self.max_y, self.top + th - 1)):
+            for x in range(max(0, self.left), min(w, self.left + tw // 2)):
+                kind = grid[y * w + x]
+                if kind == BODY: self.draw_cell(y * w + x)
+                elif kind == WALL and self.framed: self.put((y, x), WALL_CHAR)
 
     def draw_food(self):
-        try: self.stdscr.addstr(self.food[0], self.food[1] * 2, FOOD_CHAR, curses.color_pair(1) | curses.A_BOLD)
-        except: pass
+        if self.food is None: return
+        self.put(self.food, FOOD_CHAR, curses.color_pair(1) | curses.A_BOLD)
 
     def draw_ui(self):
         if self.hide_ui: return
         white = curses.color_pair(1)
         bold = white | curses.A_BOLD
+        ui_key = (self.speed_idx, self.show_vision, self.show_profile, self.score, self.high_score, self.rate,
+                  self.plan_hits, self.plan_misses, round(self.cache_hit_rate(), 2), self.budget_overruns,
+                  self.cycles, self.screen, self.extra_stats())
+        if ui_key == self.ui_key: return
+        self.ui_key = ui_key
         vision_state = "ON" if self.show_vision else "OFF"
 
         theoretical_max = self.playable_area - self.start_length
-        stats = f" Speed: {self.speed_name} | Vision: {vision_state} | Score: {self.score} / Max: {theoretical_max} Best: {self.high_score}"
+        stats = f" Speed: {self.speed_name} ({self.rate}/{round(1 / self.speed_delay)}/s) | Vision: {vision_state} | Score: {self.score} / Max: {theoretical_max} Best: {self.high_score}"
+        if self.plan_hits + self.plan_misses:
+            stats += f" | Plan: {self.plan_hit_rate():.0%}"
+        if self.cache and self.cache.hits:
+            stats += f" | Cache: {self.cache_hit_rate():.0%}"
+        if self.budget_overruns:
+            stats += f" | Over: {self.budget_overruns}"
+        if self.cycles:
+            stats += f" | Loops: {self.cycles}"
+        if self.max_y > self.screen[0] or self.max_x > self.screen[1] // 2:
+            stats += f" | Board: {self.max_y - 2}x{self.max_x - 2}"
+        stats += self.extra_stats()
 
         self.print_centered(0, stats, bold)
 
-        controls = " [▲/▼] Speed  [R] Reset  [SPACE] Pause  [V] Vision  [Q] Quit  [H] Hide UI "
-        self.print_centered(self.max_y - 1, controls, white)
+        if self.show_profile: return
+        self.print_centered(self.screen[0] - 1, self.CONTROLS, white)
+
+    def extra_stats(self):
+        return f" | Seed: {self.seed}"
+
+    def draw_profile(self):
+        if self.hide_ui: return
+        self.print_centered(self.screen[0] - 1, self.profiler.overlay(), curses.color_pair(1))
+
+    def build_minimap(self):
+        th, tw = self.screen
+        h, w = self.max_y - 2, self.max_x - 2
+        sy, sx = -(-h // max(1, (th - 4) // 3)), -(-w // max(1, tw // 4))
+        rows, cols = -(-h // sy), -(-w // sx)
+        grid, mw = self.grid, self.max_x
+        marks = {}
+        if self.food: marks[((self.food[0] - 1) // sy, (self.food[1] - 1) // sx)] = FOOD_CHAR[0]
+        marks[((self.body[0][0] - 1) // sy, (self.body[0][1] - 1) // sx)] = "@"
+        lines = []
+        for r in range(rows):
+            counts = [0] * cols
+            y0, y1 = 1 + r * sy, min(h + 1, 1 + (r + 1) * sy)
+            for y in range(y0, y1):
+                base = y * mw + 1
+                for c in range(cols):
+                    counts[c] += grid.count(BODY, base + c * sx, base + min(w, (c + 1) * sx))
+            line = ""
+            for c in range(cols):
+                area = (y1 - y0) * (min(w, (c + 1) * sx) - c * sx)
+                line += marks.get((r, c)) or MINIMAP_SHADES[-(-4 * counts[c] // area)]
+            lines.append(line)
+        view_rows = range(max(0, self.top // sy), min(rows, (self.top + th - 3) // sy + 1))
+        view_cols = (max(0, (self.left - 1) // sx), min(cols, (self.left + tw // 2 - 2) // sx + 1))
+        return lines, view_rows, view_cols
+
+    def draw_minimap(self):
+        if self.hide_ui: return
+        now = time.perf_counter()
+        if self.minimap is None or now - self.minimap_at >= MINIMAP_INTERVAL:
+            self.minimap = self.build_minimap()
+            self.minimap_at = now
+        lines, view_rows, (v0, v1) = self.minimap
+        white = curses.color_pair(1)
+        x = self.screen[1] - len(lines[0]) - 3
+        if x < 0 or len(lines) + 3 > self.screen[0]: return
+        try:
+            self.stdscr.addstr(1, x, "┌" + "─" * len(lines[0]) + "┐", white)
+            for r, line in enumerate(lines):
+                self.stdscr.addstr(r + 2, x, "│" + line[:v0], white)
+                if r in view_rows:
+                    self.stdscr.addstr(line[v0:v1], curses.color_pair(3) | curses.A_REVERSE)
+                else:
+                    self.stdscr.addstr(line[v0:v1], white)
+                self.stdscr.addstr(line[v1:] + "│", white)
+            self.stdscr.addstr(len(lines) + 2, x, "└" + "─" * len(lines[0]) + "┘", white)
+        except: pass
+
+    def toggle_minimap(self):
+        self.show_minimap = not self.show_minimap
+        self.redraw(clear=False)
+
+    def toggle_profile(self):
+        self.show_profile = not self.show_profile
+        if self.show_profile and not self.profiler:
+            self.profiler = Profiler()
+            self.profiler.attach(self, PROFILE_DRAWS)
+        elif not self.show_profile and not self.profile_out:
+            self.profiler.detach(self, PROFILE_DRAWS)
+            self.profiler = None
+        self.ui_key = None
+        if self.worker: self.worker.invalidate(self)
+
+    def present(self):
+        self.stdscr.noutrefresh()
+        curses.doupdate()
 
     def run(self):
-        self.stdscr.clear()
-        self.draw_ui()
+        if self.worker: self.worker.start()
+        try:
+            self.run_loop()
+        finally:
+            if self.worker: self.worker.stop()
+            self.save_recording()
+            self.save_snapshot()
+            if self.profiler: self.profiler.close()
+
+    def next_move(self):
+        record = self.worker.next_move()
+        if record is None: return False
+        _, move, food, self.status_msg, self.vision_path, stats = record
+        self.plan_hits, self.plan_misses, self.budget_overruns, cache_hits, cache_misses, self.cycles = stats
+        if self.cache: self.cache.hits, self.cache.misses = cache_hits, cache_misses
+        self.apply(move)
+        if self.alive and self.food != food:
+            self.worker.invalidate(self)
+        return True
+
+    def apply(self, move):
+        self.advance(move)
+        self.moved += 1
+        if self.last_tail: self.dirty.add(self.last_tail)
+
+    def handle_key(self, key):
+        pass
+
+    def on_death(self):
+        self.reset()
+
+    def render(self):
+        if self.moved and self.update_view(): self.redraw(clear=False)
+        if not (self.moved or self.dirty):
+            self.draw_ui()
+            return
+        vision = set(self.vision_path) if self.show_vision else set()
+        vision_attr = curses.color_pair(3) | curses.A_BOLD
+        for pos in self.dirty | (vision ^ self.drawn_vision):
+            if pos == self.food or self.grid[self.cell_of(pos)] != FREE: continue
+            if pos in vision: self.put(pos, VISION_CHAR, vision_attr)
+            else: self.erase_at(pos[0], pos[1])
+        self.drawn_vision = vision
+
+        if self.moved:
+            for i in range(min(self.moved + 1, len(self.body))): self.draw_segment(i)
+            if len(self.body) > 2: self.draw_segment(len(self.body) - 1)
         self.draw_food()
-        self.draw_full_snake()
-        last_score = -1
+        self.draw_ui()
+        self.dirty.clear()
+        self.moved = 0
+
+    def run_loop(self):
+        self.redraw()
+        last = time.perf_counter()
+        rate_start, rate_steps = last, 0
         while True:
-            t0 = time.time()
+            t0 = time.perf_counter()
+            self.lag += t0 - last
+            last = t0
+            if t0 - rate_start >= 1:
+                self.rate = round(rate_steps / (t0 - rate_start))
+                rate_start, rate_steps = t0, 0
             key = self.stdscr.getch()
             if key == ord('q') or key == ord('Q'): break
             elif key == ord('r') or key == ord('R'):
@@ -411,82 +1840,321 @@ class SnakeAI:
 
             if key == ord('h') or key == ord('H'):
                 self.hide_ui = not self.hide_ui
+                self.ui_key = None
                 if self.hide_ui:
                     self.stdscr.move(0, 0)
                     self.stdscr.clrtoeol()
-                    self.stdscr.move(self.max_y - 1, 0)
+                    self.stdscr.move(self.screen[0] - 1, 0)
                     self.stdscr.clrtoeol()
-                else:
-                    self.draw_ui()
+                if self.show_minimap: self.redraw(clear=False)
+            elif key == ord('p') or key == ord('P'):
+                self.toggle_profile()
+            elif key == ord('m') or key == ord('M'):
+                self.toggle_minimap()
+            else:
+                self.handle_key(key)
 
             if not self.game_over:
                 if key == ord(' '):
                     self.paused = not self.paused
-                    if self.paused: self.draw_ui()
                 elif key == ord('v') or key == ord('V'):
                     self.show_vision = not self.show_vision
-                    if not self.show_vision:
-                          for vy, vx in self.vision_path:
-                            if (vy, vx) != self.food and (vy, vx) not in self.body:
-                                self.erase_at(vy, vx)
-                    self.draw_ui()
-                elif key == curses.KEY_UP: self.change_speed(1); self.draw_ui()
-                elif key == curses.KEY_DOWN: self.change_speed(-1); self.draw_ui()
-
-            sy, sx = self.stdscr.getmaxyx()
-            if (sy, sx // 2) != (self.max_y, self.max_x): self.reset(); continue
-
-            if not self.paused and not self.game_over:
-                old_tail = self.body[-1]
-                next_move = self.get_ai_move()
-
-                self.steps_since_food += 1
-                starvation_limit = self.grid_area * 2
-
-                if self.steps_since_food > starvation_limit:
-                    if self.score > self.high_score:
-                        self.high_score = self.score
-                    self.reset()
+                    self.dirty.update(self.drawn_vision)
+                    self.dirty.update(self.vision_path)
+                elif key == curses.KEY_UP: self.change_speed(1)
+                elif key == curses.KEY_DOWN: self.change_speed(-1)
+
+            if self.stdscr.getmaxyx() != self.screen: self.redraw()
+
+            if self.paused or self.game_over:
+                self.lag = 0.0
+            else:
+                steps = 0
+                while self.lag >= self.speed_delay and steps < self.max_catch_up:
+                    if not self.next_move(): break
+                    self.lag -= self.speed_delay
+                    steps += 1
+                    if not self.alive: break
+                rate_steps += steps
+                self.lag = min(self.lag, self.speed_delay * self.max_catch_up)
+                if not self.alive:
+                    self.on_death()
                     continue
 
-                if next_move:
-                    self.body.insert(0, next_move)
-                    if next_move == self.food:
-                        self.score += 1
-                        self.food = self.spawn_food()
-                        self.steps_since_food = 0
-                    else:
-                        self.body.pop()
-                        if old_tail != next_move: self.erase_at(old_tail[0], old_tail[1])
-
-                    if self.prev_vision_path:
-                        for vy, vx in self.prev_vision_path:
-                            if (vy, vx) != self.food and (vy, vx) not in self.body: self.erase_at(vy, vx)
-                    if self.show_vision and self.vision_path:
-                        for vy, vx in self.vision_path:
-                             if (vy, vx) == self.food: continue
-                             try: self.stdscr.addstr(vy, vx * 2, VISION_CHAR, curses.color_pair(3) | curses.A_BOLD)
-                             except: pass
-                        self.prev_vision_path = list(self.vision_path)
-                    else: self.prev_vision_path = []
-
-                    self.draw_segment(0)
-                    if len(self.body) > 1: self.draw_segment(1)
-                    if len(self.body) > 2: self.draw_segment(len(self.body) - 1)
-                    self.draw_food()
-
-                    if self.score != last_score:
-                        self.draw_ui()
-                        last_score = self.score
-                else:
-                    if self.score > self.high_score:
-                        self.high_score = self.score
-                    self.reset()
-                    continue
+            self.render()
+            if self.show_minimap: self.draw_minimap()
+            if self.show_profile: self.draw_profile()
+            self.present()
+            self.autosave(t0)
+            if self.profiler: self.profiler.flush("frame", self.steps, PROFILE_DRAWS)
+            dt = time.perf_counter() - t0
+            if dt < self.frame_delay: time.sleep(self.frame_delay - dt)
+
+class ReplayAI(SnakeAI):
+    CONTROLS = " [▲/▼] Speed  [◀/▶] Seek  [R] Restart  [SPACE] Pause  [M] Map  [Q] Quit  [H] Hide UI "
+
+    def __init__(self, stdscr, args, replay):
+        self.replay = replay
+        super().__init__(stdscr, args)
+        if args.step: self.seek(args.step)
+
+    def board_size(self):
+        return self.replay.max_y, self.replay.max_x
+
+    def open_snapshot(self, args):
+        self.snapshot_path = None
+        return None
+
+    def create_worker(self):
+        return None
+
+    def reset(self, first_launch=False):
+        self.seed = self.replay.seed
+        self.seek(0)
+
+    def seek(self, step):
+        self.replay.seek(self, step)
+        self.redraw()
+
+    def extra_stats(self):
+        return f" | Seed: {self.seed} | Step: {self.steps}/{len(self.replay.moves)}"
+
+    def next_move(self):
+        if self.steps < len(self.replay.moves):
+            self.apply(self.replay.move_at(self, self.steps))
+        elif self.alive and self.replay.cause in ("starved", "trapped", "looped"):
+            self.apply(self.replay.end_move())
+        else:
+            return False
+        return True
+
+    def handle_key(self, key):
+        jump = max(1, len(self.replay.moves) // 20)
+        if key == curses.KEY_LEFT: self.seek(self.steps - jump)
+        elif key == curses.KEY_RIGHT: self.seek(self.steps + jump)
+
+    def on_death(self):
+        self.game_over = True
+        self.draw_board()
+
+class TileGame(SnakeGame):
+    def __init__(self, frame, max_y, max_x, seed, stride, planner, cache_size, params):
+        self.frame = frame
+        self.cells = frame[TILE_HEADER.size:]
+        self.base_seed = seed
+        self.stride = stride
+        self.games = 1
+        self.moves = 0
+        super().__init__(max_y, max_x, seed=seed, planner=PLANNERS[planner](), cache_size=cache_size, params=params)
+
+    def new_game(self):
+        if self.score > self.high_score: self.high_score = self.score
+        self.seed = random.randrange(1 << 32) if self.base_seed is None else self.base_seed + self.games * self.stride
+        self.games += 1
+        self.reset_board()
+
+    def reset_board(self):
+        super().reset_board()
+        cells = self.cells
+        cells[:] = self.grid.translate(bytes([0, 0, GLYPH_CODES[WALL_CHAR]]) + bytes(253))
+        for i in range(len(self.body)): self.publish_segment(i)
+        self.publish_food()
+        self.publish_header()
+
+    def advance(self, next_move):
+        food = self.food
+        result = super().advance(next_move)
+        if result in ("moved", "ate"):
+            self.moves += 1
+            self.publish_segment(0)
+            self.publish_segment(1)
+            self.publish_segment(len(self.body) - 1)
+            if self.last_tail: self.cells[self.cell_of(self.last_tail)] = 0
+            if self.food != food: self.publish_food()
+        self.publish_header()
+        return result
+
+    def publish_segment(self, i):
+        body = self.body
+        prev = body[i - 1] if i > 0 else None
+        nxt = body[i + 1] if i < len(body) - 1 else None
+        self.cells[self.cell_of(body[i])] = GLYPH_CODES[render_char(body[i], prev, nxt)]
+
+    def publish_food(self):
+        if self.food: self.cells[self.cell_of(self.food)] = GLYPH_CODES[FOOD_CHAR]
+
+    def publish_header(self):
+        TILE_HEADER.pack_into(self.frame, 0, self.moves, self.score, self.high_score, self.games, self.seed)
+
+def run_tile(shm_name, offset, size, seed, stride, planner, cache_size, params, delay, paused, resets, stop):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    h, w = size
+    frame = shm.buf[offset:offset + TILE_HEADER.size + h * w]
+    game = TileGame(frame, h, w, seed, stride, planner, cache_size, params)
+    try:
+        reset_count = resets.value
+        last = time.perf_counter()
+        lag = 0.0
+        while not stop.is_set():
+            now = time.perf_counter()
+            lag += now - last
+            last = now
+            speed = delay.value
+            if resets.value != reset_count:
+                reset_count = resets.value
+                game.new_game()
+            if paused.is_set():
+                lag = 0.0
+            else:
+                game.plan_budget = speed * PLAN_BUDGET_SHARE
+                max_catch_up = max(1, round(1 / MAX_FPS / speed)) * CATCH_UP_FRAMES
+                steps = 0
+                while lag >= speed and steps < max_catch_up:
+                    game.step()
+                    if not game.alive: game.new_game()
+                    lag -= speed
+                    steps += 1
+                lag = min(lag, speed * max_catch_up)
+            time.sleep(max(0.0, min(speed - lag, 1 / MAX_FPS)))
+    except KeyboardInterrupt: pass
+    finally:
+        game.cells.release()
+        frame.release()
+        shm.close()
+
+class TileWall:
+    def __init__(self, stdscr, args):
+        self.stdscr = stdscr
+        self.rows, self.cols = args.tiles
+        th, tw = stdscr.getmaxyx()
+        self.tile_h, self.tile_w = (th - 2) // self.rows, (tw // 2) // self.cols
+        if self.tile_h < 10 or self.tile_w < 20:
+            raise Exception(f"Terminal too small for {self.rows}x{self.cols} tiles! ({th}x{tw // 2})")
+
+        self.speed_idx = speed_index(args.speed)
+        self.delay = multiprocessing.Value('d', SPEEDS[SPEED_LIST[self.speed_idx]], lock=False)
+        self.paused = multiprocessing.Event()
+        self.stop = multiprocessing.Event()
+        self.resets = multiprocessing.Value('i', 0, lock=False)
+
+        count = self.rows * self.cols
+        self.frame_size = TILE_HEADER.size + self.tile_h * self.tile_w
+        self.shm = shared_memory.SharedMemory(create=True, size=count * self.frame_size)
+        self.frames = [self.shm.buf[i * self.frame_size:(i + 1) * self.frame_size] for i in range(count)]
+        self.cells = [frame[TILE_HEADER.size:] for frame in self.frames]
+        self.drawn = [bytearray([255]) * (self.tile_h * self.tile_w) for _ in range(count)]
+        self.labels = [None] * count
+        self.workers = []
+        for i in range(count):
+            seed = None if args.seed is None else args.seed + i
+            worker = multiprocessing.Process(
+                target=run_tile, daemon=True,
+                args=(self.shm.name, i * self.frame_size, (self.tile_h, self.tile_w), seed, count, args.planner,
+                      args.cache, args.params, self.delay, self.paused, self.resets, self.stop))
+            worker.start()
+            self.workers.append(worker)
+
+        self.rate = 0
+        self.ui_key = None
+
+    def change_speed(self, delta):
+        self.speed_idx = max(0, min(len(SPEED_LIST) - 1, self.speed_idx + delta))
+        self.delay.value = SPEEDS[SPEED_LIST[self.speed_idx]]
+
+    def headers(self):
+        return [TILE_HEADER.unpack_from(frame) for frame in self.frames]
+
+    def draw_tile(self, i):
+        cells, drawn = self.cells[i], self.drawn[i]
+        if drawn == cells: return
+        w = self.tile_w
+        oy, ox = 1 + i // self.cols * self.tile_h, i % self.cols * w
+        for y in range(self.tile_h):
+            a = y * w
+            if drawn[a:a + w] == cells[a:a + w]: continue
+            for x in range(w):
+                code = cells[a + x]
+                if code == drawn[a + x]: continue
+                drawn[a + x] = code
+                try: self.stdscr.addstr(oy + y, (ox + x) * 2, GLYPHS[code], self.attrs[code])
+                except: pass
+
+    def draw_label(self, i, header):
+        _, score, best, games, _ = header
+        label = f" {i + 1}: {score} Best: {max(score, best)} Game: {games} "
+        old = self.labels[i]
+        if label == old: return
+        if old:
+            self.drawn[i][:len(old) // 2 + 2] = bytes([255]) * (len(old) // 2 + 2)
+            self.draw_tile(i)
+        self.labels[i] = label
+        oy, ox = 1 + i // self.cols * self.tile_h, i % self.cols * self.tile_w
+        try: self.stdscr.addstr(oy, ox * 2 + 2, label[:self.tile_w * 2 - 4], curses.color_pair(1) | curses.A_BOLD)
+        except: pass
 
-            self.stdscr.refresh()
-            dt = time.time() - t0
-            if dt < self.speed_delay: time.sleep(self.speed_delay - dt)
+    def draw_ui(self, headers):
+        speed = SPEED_LIST[self.speed_idx]
+        ui_key = (self.speed_idx, self.rate, self.paused.is_set(), sum(h[3] for h in headers), max(max(h[1], h[2]) for h in headers))
+        if ui_key == self.ui_key: return
+        self.ui_key = ui_key
+        th, tw = self.stdscr.getmaxyx()
+        stats = (f" Tiles: {self.rows}x{self.cols} | Speed: {speed} ({round(1 / SPEEDS[speed])}/s each) | "
+                 f"Moves: {self.rate}/s | Games: {ui_key[3]} | Best: {ui_key[4]}")
+        if ui_key[2]: stats += " | Paused"
+        for y, text in ((0, stats), (th - 1, TILES_CONTROLS)):
+            try: self.stdscr.addstr(y, 0, text.center(tw)[:tw - 1], curses.color_pair(1) | (curses.A_BOLD if y == 0 else 0))
+            except: pass
+
+    def redraw(self):
+        self.stdscr.clear()
+        for drawn in self.drawn: drawn[:] = bytes([255]) * len(drawn)
+        self.labels = [None] * len(self.labels)
+        self.ui_key = None
+
+    def run(self):
+        white = curses.color_pair(1)
+        self.attrs = [white | curses.A_BOLD if g in HEAD_CHARS.values() or g == FOOD_CHAR else white for g in GLYPHS]
+        try:
+            self.run_loop()
+        finally:
+            self.stop.set()
+            for worker in self.workers:
+                worker.join(1)
+                if worker.is_alive(): worker.terminate()
+            for view in self.cells + self.frames: view.release()
+            self.shm.close()
+            self.shm.unlink()
+
+    def run_loop(self):
+        self.redraw()
+        rate_start, rate_moves = time.perf_counter(), None
+        while True:
+            t0 = time.perf_counter()
+            key = self.stdscr.getch()
+            if key == ord('q') or key == ord('Q'): break
+            elif key == ord('r') or key == ord('R'): self.resets.value += 1
+            elif key == ord(' '):
+                if self.paused.is_set(): self.paused.clear()
+                else: self.paused.set()
+            elif key == curses.KEY_UP: self.change_speed(1)
+            elif key == curses.KEY_DOWN: self.change_speed(-1)
+            elif key == curses.KEY_RESIZE: self.redraw()
+
+            headers = self.headers()
+            moves = sum(h[0] for h in headers)
+            if rate_moves is None: rate_moves = moves
+            if t0 - rate_start >= 1:
+                self.rate = round((moves - rate_moves) / (t0 - rate_start))
+                rate_start, rate_moves = t0, moves
+
+            for i, header in enumerate(headers):
+                self.draw_tile(i)
+                self.draw_label(i, header)
+            self.draw_ui(headers)
+            self.stdscr.noutrefresh()
+            curses.doupdate()
+            dt = time.perf_counter() - t0
+            if dt < 1 / MAX_FPS: time.sleep(1 / MAX_FPS - dt)
 
 def show_intro(stdscr):
     banner_width = max(len(line) for line in BANNER)
@@ -511,20 +2179,62 @@ def show_intro(stdscr):
 def print_help_and_exit():
     clear_screen()
     help_text = """Usage:
-  snaky [-s SPEED] [-v] [-u]
+  snaky [-s SPEED] [-v] [-u] [-m] [-p PLANNER] [--size HxW] [--seed S] [--record DIR] [--profile-out FILE]
+        [--resume [FILE]]
+  snaky --headless [--games N] [--size HxW] [--seed S] [--budget-ms MS] [--record DIR] [--profile-out FILE]
+  snaky --replay FILE [--step N] [-s SPEED] [--headless]
+  snaky --tiles RxC [-s SPEED] [-p PLANNER] [--seed S]
+  snaky --tournament [--sizes HxW,...] [--games N] [--seed S] [--jobs J] [--report FILE]
+  snaky --tune [halving|random] [--trials N] [--sizes HxW,...] [--games N] [--seed S] [--jobs J] [--report FILE]
   snaky -h | --help
 
 Flags:
   -s,  --speed SPEED    Set initial speed (default: Normal)
   -v,  --vision         Enable AI pathfinding vision
   -u,  --hide-ui        Start with UI hidden
+  -p,  --planner NAME   AI planner: heuristic or hamiltonian (default: heuristic)
+  -m,  --minimap        Start with the minimap shown
+       --size HxW       Playable board size, scrolled if larger than the terminal (default: fit terminal)
+       --seed S         Seed for the first game, +1 per game (default: random)
+       --record DIR     Save a replay of every game to DIR
+       --resume [FILE]  Continue the game saved on quit (default: ~/.snaky_save)
+       --profile-out FILE  Append per-move and per-frame timings to FILE as JSON lines
   -h,  --help           Show this help and exit
 
+Headless:
+       --headless       Play without a terminal as fast as possible
+       --games N        Number of games to play (default: 1)
+       --size HxW       Playable board size (default: 20x40 when headless)
+       --budget-ms MS   Per-move planning budget (default: unlimited)
+       --cache N        Cached search results, 0 to disable (default: 4096)
+       --params FILE    Load AI parameters from a JSON file, e.g. a "Best for" line printed by --tune
+
+Replay:
+       --replay FILE    Watch a recorded game, or re-simulate and check it with --headless
+       --step N         Start watching at move N
+
+Tiles:
+       --tiles RxC      Split the terminal into R rows by C columns of games, one process each
+
+Tournament:
+       --tournament     Play every (size, seed) job on a process pool
+       --sizes HxW,...  Board sizes to play (default: --size)
+       --jobs J         Worker processes (default: all cores)
+       --report FILE    Write per-game results and per-size summary (.json or .csv)
+
+Tuning:
+       --tune [METHOD]  Search AI parameters per board size: halving (default) or random
+       --trials N       Parameter sets to try, including the defaults (default: 32)
+       --games N        Games per parameter set, at the last round for halving (default: 16)
+
 Controls:
   [UP] / [DOWN]         Adjust speed dynamically
   [SPACE]               Pause or Resume
   [R]                   Reset game
   [V]                   Toggle AI vision
+  [M]                   Toggle minimap
+  [P]                   Toggle profiling overlay
+  [LEFT] / [RIGHT]      Seek backward / forward in a replay
   [H]                   Toggle UI visibility
   [Q]                   Quit
 
@@ -538,6 +2248,12 @@ Examples:
   snaky
   snaky -s fast -v
   snaky -s w -v -u
+  snaky -p hamiltonian -s i
+  snaky --size 200x300 -m -s w
+  snaky --tiles 2x3 -s i
+  snaky --headless --games 100 --size 30x60 --seed 1
+  snaky --tournament --sizes 20x40,30x60 --games 500 --report results.json
+  snaky --tune --sizes 10x20,20x40 --trials 64 --report tune.json
 """
     print(help_text)
     sys.exit(0)
@@ -551,8 +2267,284 @@ def parse_arguments():
     parser.add_argument('-s', '--speed', type=str, default='Normal')
     parser.add_argument('-u', '--hide-ui', action='store_true')
     parser.add_argument('-v', '--vision', action='store_true')
+    parser.add_argument('-p', '--planner', choices=sorted(PLANNERS), default='heuristic')
+    parser.add_argument('-m', '--minimap', action='store_true')
+
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--games', type=int, default=None)
+    parser.add_argument('--size', type=parse_size, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    parser.add_argument('--cache', type=int, default=SEARCH_CACHE_SIZE)
+    parser.add_argument('--params', type=parse_params, default=None)
+    parser.add_argument('--profile-out', type=str, default=None)
+    parser.add_argument('--record', type=str, default=None)
+    parser.add_argument('--replay', type=str, default=None)
+    parser.add_argument('--step', type=int, default=0)
+    parser.add_argument('--resume', nargs='?', const=DEFAULT_SNAPSHOT, default=None)
+
+    parser.add_argument('--tournament', action='store_true')
+    parser.add_argument('--sizes', type=parse_sizes, default=None)
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--tiles', type=parse_tiles, default=None)
+    parser.add_argument('--report', type=str, default=None)
+
+    parser.add_argument('--tune', nargs='?', const='halving', choices=('halving', 'random'), default=None)
+    parser.add_argument('--trials', type=int, default=TUNE_TRIALS)
+
+    args = parser.parse_args()
+    if args.games is None: args.games = TUNE_GAMES if args.tune else 1
+    if args.params and args.record: parser.error("replays assume default parameters, --params can't be used with --record")
+    return args
+
+def parse_sizes(text):
+    return [parse_size(part) for part in text.split(',') if part.strip()]
+
+def parse_params(text):
+    try:
+        return load_params(text)
+    except (OSError, ValueError, TypeError) as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-    return parser.parse_args()
+def parse_tiles(text):
+    try:
+        rows, cols = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid tiles '{text}', expected RxC")
+    if rows < 1 or cols < 1:
+        raise argparse.ArgumentTypeError(f"tiles '{text}' must be at least 1x1")
+    return rows, cols
+
+def parse_size(text):
+    try:
+        h, w = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{text}', expected HxW")
+    if h < 8 or w < 18:
+        raise argparse.ArgumentTypeError(f"size '{text}' is too small, minimum is 8x18")
+    return h, w
+
+def budget_seconds(args):
+    return None if args.budget_ms is None else args.budget_ms / 1000
+
+def play_job(job):
+    h, w, seed, planner, budget, cache_size, params = job
+    game = SnakeGame(h + 2, w + 2, seed=seed, planner=PLANNERS[planner](), plan_budget=budget, cache_size=cache_size,
+                     params=params)
+    cpu = time.process_time()
+    result = game.play()
+    result["cpu"] = time.process_time() - cpu
+    result["size"] = f"{h}x{w}"
+    result["seed"] = seed
+    return result
+
+def tune_job(job):
+    trial, play = job
+    result = play_job(play)
+    result["trial"] = trial
+    return result
+
+def summarize_results(results):
+    summary = {}
+    for r in results:
+        s = summary.setdefault(r["size"], {
+            "games": 0, "score": 0, "max_score": r["max_score"], "steps": 0,
+            "elapsed": 0.0, "cleared": 0, "starved": 0, "trapped": 0, "looped": 0, "cycles": 0, "best": 0, "plan_hit_rate": 0.0,
+            "cache_hit_rate": 0.0,
+        })
+        s["games"] += 1
+        s["score"] += r["score"]
+        s["steps"] += r["steps"]
+        s["elapsed"] += r["elapsed"]
+        s["cycles"] += r["cycles"]
+        s["best"] = max(s["best"], r["score"])
+        s["plan_hit_rate"] += r["plan_hit_rate"]
+        s["cache_hit_rate"] += r["cache_hit_rate"]
+        if r["cause"] in s: s[r["cause"]] += 1
+
+    for s in summary.values():
+        games = s["games"]
+        s["avg_score"] = round(s["score"] / games, 2)
+        s["avg_fill"] = round(s["score"] / (games * max(1, s["max_score"])), 4)
+        s["avg_steps"] = round(s["steps"] / games, 1)
+        s["moves_per_sec"] = round(s["steps"] / max(s["elapsed"], 1e-9), 1)
+        s["plan_hit_rate"] = round(s["plan_hit_rate"] / games, 4)
+        s["cache_hit_rate"] = round(s["cache_hit_rate"] / games, 4)
+        del s["score"]
+    return summary
+
+def write_report(path, config, results, summary):
+    if path.lower().endswith('.csv'):
+        fields = ["size", "seed", "score", "max_score", "steps", "starvation_resets",
+                  "cause", "killer_pos", "plan_hit_rate", "cache_hit_rate", "budget_overruns", "budget_cuts", "cycles", "elapsed"]
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for r in results:
+                row = dict(r)
+                row["killer_pos"] = "" if r["killer_pos"] is None else f"{r['killer_pos'][0]},{r['killer_pos'][1]}"
+                writer.writerow(row)
+
+        base, ext = os.path.splitext(path)
+        with open(f"{base}_summary{ext}", 'w', newline='') as f:
+            fields = ["size"] + list(next(iter(summary.values())).keys())
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for size, s in summary.items():
+                writer.writerow(dict(s, size=size))
+    else:
+        with open(path, 'w') as f:
+            json.dump({"config": config, "summary": summary, "games": results}, f, indent=2)
+
+def run_tournament(args):
+    sizes = args.sizes or [args.size or DEFAULT_SIZE]
+    base_seed = 0 if args.seed is None else args.seed
+    budget = budget_seconds(args)
+    jobs = [(h, w, base_seed + i, args.planner, budget, args.cache, args.params)
+            for h, w in sizes for i in range(args.games)]
+    workers = max(1, args.jobs or os.cpu_count() or 1)
+
+    t0 = time.perf_counter()
+    results = []
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(play_job, jobs, chunksize=max(1, len(jobs) // (workers * 8))):
+            results.append(result)
+            print(f"\r{len(results)}/{len(jobs)} games", end='', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    wall = time.perf_counter() - t0
+
+    order = {f"{h}x{w}": i for i, (h, w) in enumerate(sizes)}
+    results.sort(key=lambda r: (order[r["size"]], r["seed"]))
+    summary = summarize_results(results)
+
+    for size, s in summary.items():
+        print(f"{size:>9}  Games: {s['games']}  Avg Score: {s['avg_score']} / Max: {s['max_score']}  "
+              f"Fill: {s['avg_fill'] * 100:.1f}%  Cleared: {s['cleared']}  Starved: {s['starved']}  "
+              f"Trapped: {s['trapped']}  Looped: {s['looped']}  Moves/sec: {s['moves_per_sec']:.0f}")
+    print(f"Total  Games: {len(results)}  Workers: {workers}  Wall time: {wall:.1f}s")
+
+    if args.report:
+        config = {"sizes": list(order), "games": args.games, "seed": base_seed, "jobs": workers,
+                  "planner": args.planner, "budget_ms": args.budget_ms,
+                  "params": asdict(args.params or DEFAULT_PARAMS)}
+        write_report(args.report, config, results, summary)
+        print(f"Report written to {args.report}")
+
+def sample_params(rng, count):
+    candidates = [DEFAULT_PARAMS]
+    for _ in range(count * 20):
+        if len(candidates) >= count: break
+        params = Params(**{name: rng.choice(values) for name, values in PARAM_SPACE.items()})
+        if params not in candidates: candidates.append(params)
+    return candidates
+
+def trial_stats(results):
+    score = sum(r["score"] for r in results)
+    cpu = sum(r["cpu"] for r in results)
+    return {
+        "games": len(results),
+        "avg_score": round(score / max(1, len(results)), 2),
+        "avg_fill": round(score / max(1, sum(r["max_score"] for r in results)), 4),
+        "score_per_cpu": round(score / max(cpu, 1e-9), 2),
+        "cpu": round(cpu, 2),
+    }
+
+def describe_params(params):
+    changed = [f"{k}={v}" for k, v in asdict(params).items() if v != getattr(DEFAULT_PARAMS, k)]
+    return " ".join(changed) or "defaults"
+
+def run_tune(args):
+    sizes = args.sizes or [args.size or DEFAULT_SIZE]
+    base_seed = 0 if args.seed is None else args.seed
+    budget = budget_seconds(args)
+    workers = max(1, args.jobs or os.cpu_count() or 1)
+    candidates = sample_params(random.Random(base_seed), args.trials)
+    sizes_report = {}
+
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for h, w in sizes:
+            results = [[] for _ in candidates]
+            alive = list(range(len(candidates)))
+            games = args.games if args.tune == "random" else 1
+            while True:
+                jobs = [(i, (h, w, base_seed + g, args.planner, budget, args.cache, candidates[i]))
+                        for i in alive for g in range(len(results[i]), games)]
+                for done, result in enumerate(pool.imap_unordered(tune_job, jobs), 1):
+                    results[result["trial"]].append(result)
+                    print(f"\r{h}x{w}  {len(alive)} configs x {games} games  {done}/{len(jobs)}",
+                          end='', file=sys.stderr, flush=True)
+                print(file=sys.stderr)
+                alive.sort(key=lambda i: trial_stats(results[i])["score_per_cpu"], reverse=True)
+                if games >= args.games or len(alive) <= 1: break
+                alive = alive[:max(1, len(alive) // 2)]
+                games = min(args.games, games * 2)
+
+            ranked = alive + sorted(set(range(len(candidates))) - set(alive),
+                                    key=lambda i: (len(results[i]), trial_stats(results[i])["score_per_cpu"]),
+                                    reverse=True)
+            trials = [dict(trial_stats(results[i]), params=asdict(candidates[i])) for i in ranked]
+            sizes_report[f"{h}x{w}"] = {"best": trials[0]["params"], "trials": trials}
+
+            print(f"{h}x{w}  {len(candidates)} configs, {args.tune}, up to {args.games} games each")
+            print(f"  {'#':>2}  {'Games':>5}  {'Avg Score':>9}  {'Fill':>6}  {'Score/CPU-s':>11}  Params")
+            for rank, i in enumerate(ranked[:5], 1):
+                s = trial_stats(results[i])
+                print(f"  {rank:>2}  {s['games']:>5}  {s['avg_score']:>9}  {s['avg_fill'] * 100:>5.1f}%  "
+                      f"{s['score_per_cpu']:>11.1f}  {describe_params(candidates[i])}")
+            print(f"Best for {h}x{w}: {json.dumps(trials[0]['params'])}")
+    print(f"Total  Configs: {len(candidates)}  Workers: {workers}  Wall time: {time.perf_counter() - t0:.1f}s")
+
+    if args.report:
+        config = {"sizes": list(sizes_report), "method": args.tune, "trials": len(candidates), "games": args.games,
+                  "seed": base_seed, "jobs": workers, "planner": args.planner, "budget_ms": args.budget_ms}
+        with open(args.report, 'w') as f:
+            json.dump({"config": config, "sizes": sizes_report}, f, indent=2)
+        print(f"Report written to {args.report}")
+
+def run_headless(args):
+    h, w = args.size or DEFAULT_SIZE
+    total_score = total_steps = 0
+    total_time = 0.0
+    profiler = Profiler(args.profile_out) if args.profile_out else None
+    for i in range(args.games):
+        seed = None if args.seed is None else args.seed + i
+        game = SnakeGame(h + 2, w + 2, seed=seed, planner=PLANNERS[args.planner](),
+                         plan_budget=budget_seconds(args), cache_size=args.cache, params=args.params)
+        if profiler: profiler.attach_game(game)
+        if args.record: game.recorder = Replay(game.max_y, game.max_x, game.seed)
+        result = game.play()
+        if args.record:
+            game.recorder.finish(game)
+            os.makedirs(args.record, exist_ok=True)
+            game.recorder.save(os.path.join(args.record, game.recorder.filename()))
+        total_score += result["score"]
+        total_steps += result["steps"]
+        total_time += result["elapsed"]
+        rate = result["steps"] / max(result["elapsed"], 1e-9)
+        print(f"Game {i + 1}/{args.games}  Seed: {game.seed}  Score: {result['score']} / Max: {result['max_score']}  "
+              f"Steps: {result['steps']}  End: {result['cause']}  Plan: {result['plan_hit_rate']:.0%}  "
+              f"Cache: {result['cache_hit_rate']:.0%}  "
+              f"Over budget: {result['budget_overruns']}  Loops: {result['cycles']}  Moves/sec: {rate:.0f}")
+
+    if args.games > 1:
+        avg_score = total_score / args.games
+        rate = total_steps / max(total_time, 1e-9)
+        print(f"Total  Games: {args.games}  Avg Score: {avg_score:.1f}  Steps: {total_steps}  Moves/sec: {rate:.0f}")
+    if profiler: profiler.close()
+
+def run_replay(args):
+    replay = Replay.load(args.replay)
+    game = SnakeGame(replay.max_y, replay.max_x, seed=replay.seed)
+    t0 = time.perf_counter()
+    mismatches = replay.verify(game)
+    elapsed = time.perf_counter() - t0
+    print(f"Replay {args.replay}  Size: {replay.max_y - 2}x{replay.max_x - 2}  Seed: {replay.seed}  "
+          f"Steps: {len(replay.moves)}  Keyframes: {len(replay.keyframes)}")
+    print(f"Recorded  Score: {replay.score}  End: {replay.cause}")
+    print(f"Replayed  Score: {game.score}  End: {game.death_cause}  Keyframe mismatches: {mismatches}  "
+          f"Moves/sec: {game.steps / max(elapsed, 1e-9):.0f}")
+    return game.score == replay.score and game.death_cause == replay.cause and not mismatches
 
 def main(stdscr, args, skip_intro):
     try:
@@ -574,7 +2566,12 @@ def main(stdscr, args, skip_intro):
 
     stdscr.nodelay(True)
     try:
-        game = SnakeAI(stdscr, args)
+        if args.tiles:
+            game = TileWall(stdscr, args)
+        elif args.replay:
+            game = ReplayAI(stdscr, args, Replay.load(args.replay))
+        else:
+            game = SnakeAI(stdscr, args)
         game.run()
     except Exception as e:
         stdscr.addstr(0, 0, f"Error: {e}")
@@ -582,12 +2579,25 @@ def main(stdscr, args, skip_intro):
         time.sleep(3)
 
 if __name__ == "__main__":
-    clear_screen()
-
-    known_flags = {'-s', '--speed', '-v', '--vision', '-u', '--hide-ui'}
+    known_flags = {'-s', '--speed', '-v', '--vision', '-u', '--hide-ui', '-p', '--planner', '--profile-out', '--seed', '--record', '--replay',
+                   '-m', '--minimap', '--size', '--tiles', '--params',
+                   '--resume'}
     has_args = any(arg in sys.argv for arg in known_flags)
 
     args = parse_arguments()
+    if args.replay and args.headless:
+        sys.exit(0 if run_replay(args) else 1)
+    if args.tune:
+        run_tune(args)
+        sys.exit(0)
+    if args.tournament:
+        run_tournament(args)
+        sys.exit(0)
+    if args.headless:
+        run_headless(args)
+        sys.exit(0)
+
+    clear_screen()
 
     try:
         curses.wrapper(main, args, has_args)